@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Phone Number Lookup Tool
+Measures the lookup and analysis hot paths on synthetic, deterministic corpora
+and compares runs against a stored baseline.
+License: MIT
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import phonenumbers
+
+from phone_lookup import DEFAULT_CHUNK_SIZE, NUMBER_TYPE_LABELS, PhoneLookupTool, iter_chunks, load_numpy
+
+CORPORA = ("mixed", "skewed", "pathological")
+SCENARIOS = ("basic", "advanced", "report", "patterns", "risk", "batch", "parallel")
+DEFAULT_SIZE = 5000
+DEFAULT_SEED = 1234
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_REPEAT = 3
+
+def example_numbers():
+    """Return E.164 example numbers for every supported region and number type"""
+    numbers = []
+    for region_code in sorted(phonenumbers.SUPPORTED_REGIONS):
+        for number_type in NUMBER_TYPE_LABELS:
+            example = phonenumbers.example_number_for_type(region_code, number_type)
+            if example is not None:
+                numbers.append(phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164))
+    return numbers
+
+def vary(rng, e164, max_changed=4):
+    """Replace up to max_changed trailing digits of a number"""
+    changed = rng.randint(1, max_changed)
+    return e164[:-changed] + "".join(rng.choice("0123456789") for _ in range(changed))
+
+def mixed_corpus(size, seed):
+    """Numbers spread evenly over all countries and number types"""
+    rng = random.Random(seed)
+    examples = example_numbers()
+    return [vary(rng, rng.choice(examples)) for _ in range(size)]
+
+def skewed_corpus(size, seed, prefixes=200, exponent=1.2):
+    """Numbers drawn from a Zipf-like distribution over a few hundred prefixes
+
+    Mirrors real traffic where a handful of area codes and operator ranges
+    dominate; this is what the prefix cache is meant to exploit.
+    """
+    rng = random.Random(seed)
+    examples = example_numbers()
+    rng.shuffle(examples)
+    hot = [e164[:-4] for e164 in examples[:prefixes]]
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(hot))]
+    return [vary(rng, prefix + "0000") for prefix in rng.choices(hot, weights, k=size)]
+
+def random_digits(rng, n):
+    """n random digits"""
+    return "".join(rng.choice("0123456789") for _ in range(n))
+
+def repeated_digits(rng, n):
+    """One non-zero digit repeated n times"""
+    return rng.choice("123456789") * n
+
+def ascending_digits(rng, n):
+    """n digits counting up from a random start, wrapping after 9"""
+    start = int(rng.choice("123456789"))
+    return "".join(str((start + i) % 10) for i in range(n))
+
+def descending_digits(rng, n):
+    """n digits counting down from a random start, wrapping below 0"""
+    start = int(rng.choice("123456789"))
+    return "".join(str((start - i) % 10) for i in range(n))
+
+def palindrome_digits(rng, n):
+    """Random half of n digits mirrored into a palindrome of n - 1 digits"""
+    half = random_digits(rng, n // 2)
+    if n % 2 == 0:
+        # Share the middle digit
+        return half + half[-2::-1]
+    return half + half[::-1]
+
+def repeated_group(rng, n):
+    """A random group of two to four digits repeated n times"""
+    group = rng.choice("123456789") + random_digits(rng, rng.randint(1, 3))
+    return group * n
+
+PATHOLOGICAL_GENERATORS = (
+    repeated_digits, ascending_digits, descending_digits, palindrome_digits, repeated_group, random_digits,
+)
+
+def pathological_corpus(size, seed):
+    """Digit patterns that stress the pattern and risk scans, plus invalid input"""
+    rng = random.Random(seed)
+    country_codes = ["1", "44", "49", "33", "91", "55", "86", "7"]
+    corpus = []
+    for _ in range(size):
+        generator = rng.choice(PATHOLOGICAL_GENERATORS)
+        digits = generator(rng, rng.randint(4, 17))[:17].lstrip("0") or "1"
+        if rng.random() < 0.1:
+            corpus.append(rng.choice(["", "+", "not a number", "+" + "9" * 30, "++1415"]))
+        else:
+            corpus.append("+" + rng.choice(country_codes) + digits)
+    return corpus
+
+CORPUS_BUILDERS = {
+    "mixed": mixed_corpus,
+    "skewed": skewed_corpus,
+    "pathological": pathological_corpus,
+}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def time_calls(function, items):
+    """Call function once per item, returning (total seconds, per-call latencies in seconds)"""
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for item in items:
+        before = clock()
+        function(item)
+        latencies.append(clock() - before)
+    return clock() - started, latencies
+
+def digit_strings(tool, numbers):
+    """National significant digits for every parseable number in a corpus"""
+    digits = []
+    for phone_number in numbers:
+        result = tool.lookup(phone_number, advanced=False)
+        if result.digits is not None:
+            digits.append(result.digits)
+    return digits
+
+def run_scenario(scenario, numbers, workers, chunk_size):
+    """Run one scenario on a fresh tool, returning (items, seconds, latencies)
+
+    Batch and parallel runs report the time between successive chunk pulls
+    divided by the chunk length, so p50/p99 stay comparable with the
+    per-number scenarios.
+    """
+    tool = PhoneLookupTool()
+    try:
+        if scenario == "basic":
+            total, latencies = time_calls(lambda number: tool.lookup(number, advanced=False), numbers)
+            return len(numbers), total, latencies
+        if scenario == "advanced":
+            total, latencies = time_calls(tool.lookup, numbers)
+            return len(numbers), total, latencies
+        if scenario == "report":
+            def report(number):
+                # The interactive basic_lookup + advanced_analysis path, printing into a discarded buffer
+                with redirect_stdout(io.StringIO()):
+                    tool.basic_lookup(number)
+                    tool.advanced_analysis(number)
+            total, latencies = time_calls(report, numbers)
+            return len(numbers), total, latencies
+        if scenario in ("patterns", "risk"):
+            digits = digit_strings(tool, numbers)
+            function = tool.detect_patterns if scenario == "patterns" else tool.assess_risk
+            total, latencies = time_calls(function, digits)
+            return len(digits), total, latencies
+
+        clock = time.perf_counter
+        marks = []
+        lengths = []
+
+        def marked_chunks():
+            # The engine pulls the next chunk only once the previous one has been written
+            for chunk in iter_chunks(numbers, chunk_size):
+                marks.append(clock())
+                lengths.append(len(chunk))
+                yield from chunk
+
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            started = clock()
+            tool.run_batch(marked_chunks(), sink, workers if scenario == "parallel" else 1, chunk_size)
+            total = clock() - started
+        marks.append(started + total)
+        latencies = [(marks[i + 1] - marks[i]) / lengths[i] for i in range(len(lengths))]
+        return len(numbers), total, latencies
+    finally:
+        tool.close()
+
+def measure_peak_memory(scenario, numbers, workers, chunk_size):
+    """Peak traced Python allocations in bytes for a scenario (parent process only)"""
+    tracemalloc.start()
+    try:
+        run_scenario(scenario, numbers, workers, chunk_size)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def warm_up(numbers):
+    """Load NumPy, the prefix tables and every region's metadata a corpus touches before timing"""
+    # lookup_many() imports NumPy lazily, so without this the first timed batch pays for it
+    load_numpy()
+    tool = PhoneLookupTool()
+    tool.lookup_many(numbers)
+    tool.close()
+
+def run_benchmarks(corpora, scenarios, size, seed, workers, chunk_size, repeat=DEFAULT_REPEAT, memory=True):
+    """Run every scenario on every corpus and return a list of result dicts
+
+    Each scenario runs repeat times and the fastest run is kept, which filters
+    out most scheduler and frequency-scaling noise.
+    """
+    results = []
+    for corpus_name in corpora:
+        numbers = CORPUS_BUILDERS[corpus_name](size, seed)
+        warm_up(numbers)
+        for scenario in scenarios:
+            runs = [run_scenario(scenario, numbers, workers, chunk_size) for _ in range(repeat)]
+            items, total, latencies = min(runs, key=lambda run: run[1])
+            latencies.sort()
+            results.append({
+                "corpus": corpus_name,
+                "scenario": scenario,
+                "items": items,
+                "seconds": round(total, 6),
+                "per_second": round(items / total, 1) if total else 0.0,
+                "p50_us": round(percentile(latencies, 0.50) * 1e6, 2),
+                "p99_us": round(percentile(latencies, 0.99) * 1e6, 2),
+                "peak_kib": round(measure_peak_memory(scenario, numbers, workers, chunk_size) / 1024, 1) if memory else None,
+            })
+            print_result(results[-1])
+    return results
+
+def print_result(result):
+    """Print one result row"""
+    peak = f"{result['peak_kib']:>10.1f}" if result["peak_kib"] is not None else f"{'-':>10}"
+    print(f"{result['corpus']:<13} {result['scenario']:<9} {result['items']:>7} "
+          f"{result['per_second']:>12.1f} {result['p50_us']:>10.2f} {result['p99_us']:>10.2f} {peak}",
+          flush=True)
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print throughput changes against a baseline; return the list of regressions"""
+    previous = {(entry["corpus"], entry["scenario"]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"\n📊 Compared with baseline (phonenumbers {baseline.get('phonenumbers_version', '?')}, "
+          f"tolerance {tolerance:.0%}):")
+    for result in results:
+        before = previous.get((result["corpus"], result["scenario"]))
+        if before is None or not before["per_second"]:
+            continue
+        change = result["per_second"] / before["per_second"] - 1
+        flag = "✅"
+        if change < -tolerance:
+            flag = "❌"
+            regressions.append((result, change))
+        print(f"  {flag} {result['corpus']:<13} {result['scenario']:<9} "
+              f"{before['per_second']:>12.1f} -> {result['per_second']:>12.1f} numbers/sec ({change:+.1%})")
+    return regressions
+
+def main():
+    """Command line interface for the benchmark suite"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the phone lookup and analysis hot paths',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 bench_phone_lookup.py
+  python3 bench_phone_lookup.py --size 20000 --save-baseline bench_baseline.json
+  python3 bench_phone_lookup.py --compare bench_baseline.json
+  python3 bench_phone_lookup.py --corpus skewed --scenario batch --scenario parallel --workers 8
+        """
+    )
+    parser.add_argument('--corpus', action='append', choices=CORPORA, help='Corpus to run (repeatable, default: all)')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help=f'Numbers per corpus (default: {DEFAULT_SIZE})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'Corpus random seed (default: {DEFAULT_SEED})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for the parallel scenario (default: CPU count)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'Runs per scenario, fastest kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'Batch chunk size (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc peak memory pass')
+    parser.add_argument('--json', metavar='FILE', help='Write results as JSON to FILE')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Store results as a baseline for later --compare runs')
+    parser.add_argument('--compare', metavar='FILE', help='Compare numbers/sec against a stored baseline; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help=f'Allowed throughput drop before a regression is reported (default: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args()
+
+    if min(args.size, args.workers, args.chunk_size, args.repeat) < 1:
+        parser.error('--size, --workers, --chunk-size and --repeat must be positive')
+
+    print(f"🏁 phonenumbers {phonenumbers.__version__}, Python {sys.version.split()[0]}, "
+          f"{args.size} numbers per corpus, seed {args.seed}, {args.workers} workers\n")
+    print(f"{'corpus':<13} {'scenario':<9} {'items':>7} {'numbers/sec':>12} {'p50 us':>10} {'p99 us':>10} {'peak KiB':>10}")
+
+    results = run_benchmarks(args.corpus or CORPORA, args.scenario or SCENARIOS, args.size, args.seed,
+                             args.workers, args.chunk_size, args.repeat, memory=not args.no_memory)
+    report = {
+        "phonenumbers_version": phonenumbers.__version__,
+        "python_version": sys.version.split()[0],
+        "size": args.size,
+        "seed": args.seed,
+        "workers": args.workers,
+        "chunk_size": args.chunk_size,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline.get("size"), baseline.get("seed")) != (args.size, args.seed):
+            print("⚠️  Baseline was recorded with a different --size/--seed; numbers are not directly comparable")
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} scenario(s) slower than the baseline")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,1901 @@ Author: Security Researcher
 License: MIT
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+# Only the core parsing metadata is imported up front. The geocoder, carrier and
+# timezone tables, requests, sqlite3 and the process pool are imported on first use
+# so validation-only and short runs start quickly.
 import phonenumbers
-from phonenumbers import geocoder, carrier, timezone
 import argparse
+import csv
 import sys
-import requests
 import re
-from bs4 import BeautifulSoup
 import json
+import mmap
+import os
+import pickle
+import random
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from itertools import chain, islice
 from urllib.parse import quote
+_IMPORTS_DONE = time.perf_counter()
 
-class PhoneLookupTool:
+DEFAULT_CHUNK_SIZE = 500
+OUTPUT_BUFFER_SIZE = 1 << 20
+DEFAULT_PREFIX_CACHE_SIZE = 8192
+# Below this many numbers the NumPy setup cost outweighs the vectorized scan
+VECTORIZE_MIN_BATCH = 32
+DEFAULT_RESULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_RESULT_CACHE_MAX_ENTRIES = 1000000
+E164_PATTERN = re.compile(r'\+[0-9]+$')
+PREFIX_INDEX_MAGIC = b"PHIDX001"
+INDEX_VERIFY_VARIANTS = 10
+UNKNOWN_TIMEZONES = ("Etc/Unknown",)
+DEFAULT_ENRICH_TIMEOUT = 10
+DEFAULT_ENRICH_RETRIES = 2
+DEFAULT_SERVE_MAX_PENDING = 64
+DEFAULT_SERVE_MAX_BATCH = 10000
+SERVE_MAX_BODY = 16 << 20
+DEFAULT_DEDUP_CAPACITY = 10000000
+DEFAULT_DEDUP_ERROR_RATE = 0.001
+DEFAULT_CHECKPOINT_INTERVAL = 30
+# Batch chunks per worker between checkpoint opportunities
+CHECKPOINT_SEGMENT_CHUNKS = 16
+
+# Typical national number length by country, matched against the country name
+TYPICAL_LENGTHS = {
+    "US": 10, "GB": 10, "CA": 10, "AU": 9, "DE": 10,
+    "FR": 9, "IT": 10, "ES": 9, "BR": 11, "IN": 10
+}
+
+NUMBER_TYPE_LABELS = {
+    phonenumbers.PhoneNumberType.MOBILE: "📱 Mobile",
+    phonenumbers.PhoneNumberType.FIXED_LINE: "🏠 Fixed Line",
+    phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE: "📞 Fixed Line or Mobile",
+    phonenumbers.PhoneNumberType.VOIP: "💻 VOIP",
+    phonenumbers.PhoneNumberType.TOLL_FREE: "🆓 Toll Free",
+    phonenumbers.PhoneNumberType.PREMIUM_RATE: "💰 Premium Rate",
+    phonenumbers.PhoneNumberType.SHARED_COST: "👥 Shared Cost",
+    phonenumbers.PhoneNumberType.PERSONAL_NUMBER: "👤 Personal Number",
+    phonenumbers.PhoneNumberType.PAGER: "📟 Pager",
+    phonenumbers.PhoneNumberType.UAN: "🏢 UAN",
+    phonenumbers.PhoneNumberType.VOICEMAIL: "📭 Voicemail",
+}
+
+def iter_input_numbers(stream):
+    """Yield phone numbers from a text stream, one per line"""
+    for line in stream:
+        number = line.strip()
+        if number and not number.startswith('#'):
+            yield number
+
+def open_input(path):
+    """Open an input file for reading, where "-" means stdin"""
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8')
+
+class MappedInput:
+    """Memory-mapped input file with one number per line, readable in newline-aligned byte ranges
+    
+    The file is decoded one bounded block at a time straight from the map,
+    never read into memory as a whole, and pool workers map the same file to
+    read their own ranges instead of receiving pickled numbers.
+    """
+    
+    BLOCK_BYTES = 1 << 20
+    SAMPLE_BYTES = 1 << 16
+    
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # Empty files cannot be mapped
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __iter__(self):
+        return self.iter_range(0, self.size)
+    
+    def iter_range(self, start, end):
+        """Yield the numbers on the lines within [start, end), skipping blanks and comments"""
+        if self._mmap is None:
+            return
+        for block_start, block_end in self.split(self.BLOCK_BYTES, start, end):
+            # One decode and split per block is much cheaper than per-line reads
+            for line in self._mmap[block_start:block_end].decode("utf-8", "replace").split("\n"):
+                number = line.strip()
+                if number and not number.startswith('#'):
+                    yield number
+    
+    def range_bytes(self, lines):
+        """Estimate the byte size of a range holding about this many lines"""
+        if self._mmap is None:
+            return 1
+        sample = self._mmap[:self.SAMPLE_BYTES]
+        return max(1, int(lines * len(sample) / max(1, sample.count(b"\n"))))
+    
+    def split(self, target_bytes, start=0, end=None):
+        """Yield (start, end) byte ranges of about target_bytes, each ending after a newline"""
+        end = self.size if end is None else end
+        while start < end:
+            stop = start + target_bytes
+            if stop >= end:
+                stop = end
+            else:
+                newline = self._mmap.find(b"\n", stop - 1, end)
+                stop = end if newline < 0 else newline + 1
+            yield start, stop
+            start = stop
+    
+    def close(self):
+        """Unmap the file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class NumberBlock:
+    """Contiguous block of E.164 numbers, given as "+1415555XXXX" or "+14155550000-+14155559999"
+    
+    Numbers are generated on demand, so a block of any size streams in constant
+    memory, and pool workers enumerate their own slices of it instead of
+    receiving pickled numbers.
+    """
+    
+    MAX_DIGITS = 15
+    
+    def __init__(self, spec):
+        spec = spec.replace(" ", "")
+        if "-" in spec:
+            start, end = spec.split("-", 1)
+        else:
+            prefix = spec.rstrip("Xx")
+            wildcards = len(spec) - len(prefix)
+            if not wildcards:
+                raise ValueError(f"expected trailing X wildcards or START-END, got {spec!r}")
+            start = prefix + "0" * wildcards
+            end = prefix + "9" * wildcards
+        for number in (start, end):
+            if not E164_PATTERN.match(number) or number[1] == "0" or len(number) - 1 > self.MAX_DIGITS:
+                raise ValueError(f"{number!r} is not an E.164 number (a \"+\" and up to {self.MAX_DIGITS} digits)")
+        if len(start) != len(end):
+            raise ValueError("start and end must have the same number of digits")
+        self.first = int(start[1:])
+        self.last = int(end[1:])
+        if self.first > self.last:
+            raise ValueError("start must not be greater than end")
+    
+    def __len__(self):
+        return self.last - self.first + 1
+    
+    def __iter__(self):
+        return self.numbers(0, len(self))
+    
+    def numbers(self, start, stop):
+        """Yield the numbers at positions [start, stop) of the block as E.164 strings"""
+        for value in range(self.first + start, self.first + min(stop, len(self))):
+            yield f"+{value}"
+    
+    def split(self, size):
+        """Yield (start, stop) positions of consecutive slices of up to size numbers"""
+        for start in range(0, len(self), size):
+            yield start, min(start + size, len(self))
+
+def open_output(path=None, resume_offset=None):
+    """Open a buffered UTF-8 text stream for records, where None or "-" means stdout
+    
+    With resume_offset the file is cut back to that many bytes and appended to.
+    """
+    if path in (None, '-'):
+        # Reuse the stdout file descriptor with a large buffer instead of line-buffered sys.stdout
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE, closefd=False)
+    if resume_offset is not None:
+        with open(path, 'r+b') as f:
+            f.truncate(resume_offset)
+        return open(path, 'a', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+    return open(path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+
+class RecordWriter:
+    """Serialize analysis records to a stream, one at a time
+    
+    count is the number of records already in the stream when resuming a run.
+    """
+    
+    def __init__(self, stream, count=0):
+        self.stream = stream
+        self.count = count
+    
+    def write(self, record):
+        """Serialize one record"""
+        self.stream.write(self.render(record))
+        self.count += 1
+    
+    def render(self, record):
+        raise NotImplementedError
+    
+    def close(self):
+        """Finish the document and flush buffered output"""
+        self.stream.flush()
+
+class NdjsonWriter(RecordWriter):
+    """One JSON object per line"""
+    
+    def render(self, record):
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+class JsonWriter(RecordWriter):
+    """A single JSON array, streamed element by element"""
+    
+    def render(self, record):
+        prefix = "[\n" if self.count == 0 else ",\n"
+        return prefix + json.dumps(record, ensure_ascii=False)
+    
+    def close(self):
+        self.stream.write("\n]\n" if self.count else "[]\n")
+        super().close()
+
+class CsvWriter(RecordWriter):
+    """Flat CSV with a header row; list fields are joined with semicolons"""
+    
+    FIELDS = (
+        "input", "valid", "error", "number", "national_format", "e164_format", "possible",
+        "type", "location", "carrier", "timezones", "country_code", "region_code", "national_number",
+        "patterns", "risk_level", "risk_reason", "enrichment",
+    )
+    
+    def __init__(self, stream, count=0):
+        super().__init__(stream, count)
+        self._csv = csv.writer(stream, lineterminator="\n")
+    
+    def write(self, record):
+        # The header goes out with the first record so a resumed file never repeats it
+        if self.count == 0:
+            self._csv.writerow(self.FIELDS)
+        row = dict(record)
+        risk = row.pop("risk", None)
+        if risk:
+            row["risk_level"] = risk["level"]
+            row["risk_reason"] = risk["reason"]
+        for field in ("timezones", "patterns"):
+            if field in row:
+                row[field] = "; ".join(row[field])
+        if "enrichment" in row:
+            row["enrichment"] = json.dumps(row["enrichment"], ensure_ascii=False)
+        self._csv.writerow([row.get(field, "") for field in self.FIELDS])
+        self.count += 1
+    
+    def close(self):
+        if self.count == 0:
+            self._csv.writerow(self.FIELDS)
+        super().close()
+
+class TextWriter(RecordWriter):
+    """Compact human-readable block per record"""
+    
+    def render(self, record):
+        if not record.get("valid"):
+            return f"❌ {record['input']}: {record.get('error', 'Invalid phone number')}\n\n"
+        lines = [f"✅ {record['input']}"]
+        if "number" in record:
+            timezones = ", ".join(record["timezones"]) if record["timezones"] else "Unknown"
+            lines.extend([
+                f"  International: {record['number']}",
+                f"  Type:          {record['type']}",
+                f"  Location:      {record['location']}",
+                f"  Carrier:       {record['carrier']}",
+                f"  Timezones:     {timezones}",
+            ])
+        else:
+            lines.append(f"  E164:          {record['e164_format']}")
+        if record.get("risk"):
+            lines.append(f"  Risk:          {record['risk']['level']} - {record['risk']['reason']}")
+        if record.get("patterns"):
+            lines.append(f"  Patterns:      {'; '.join(record['patterns'])}")
+        for name, answer in record.get("enrichment", {}).items():
+            detail = json.dumps(answer["data"], ensure_ascii=False) if answer["status"] == "ok" else f"❌ {answer['error']}"
+            lines.append(f"  {name}: {detail}")
+        return "\n".join(lines) + "\n\n"
+
+OUTPUT_FORMATS = {
+    "ndjson": NdjsonWriter,
+    "json": JsonWriter,
+    "csv": CsvWriter,
+    "text": TextWriter,
+}
+
+class DictionaryColumn:
+    """Column of repeated strings stored as integer codes into a list of distinct values"""
+    
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0'
+        self.codes = array("i")
+        self.values = []
+        self._index = {}
+    
+    def append(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+    
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+    
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes) + sum(len(value) for value in self.values)
+
+class ColumnarStore:
+    """Compact in-memory result table: typed arrays plus dictionary-encoded string columns
+    
+    A row costs about 50 bytes instead of a dict of strings per number, so tens
+    of millions of results fit in memory. Raw input text and enrichment answers
+    are not kept; e164 and national_number are stored as integers (0 if absent)
+    and list fields are joined with "; ".
+    """
+    
+    NUMERIC = (("e164", "q"), ("national_number", "q"), ("country_code", "H"), ("valid", "b"), ("possible", "b"))
+    DICTIONARY = ("region_code", "type", "location", "carrier", "timezones", "patterns",
+                  "risk_level", "risk_reason", "error")
+    EXPORTS = (".npz", ".parquet", ".arrow", ".feather")
+    
+    def __init__(self):
+        self.numeric = {name: array(typecode) for name, typecode in self.NUMERIC}
+        self.dictionary = {name: DictionaryColumn() for name in self.DICTIONARY}
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def write(self, record):
+        """Append one batch record as a row"""
+        numeric = self.numeric
+        e164 = record.get("e164_format")
+        numeric["e164"].append(int(e164[1:]) if e164 else 0)
+        numeric["national_number"].append(record.get("national_number") or 0)
+        numeric["country_code"].append(record.get("country_code") or 0)
+        numeric["valid"].append(bool(record.get("valid")))
+        numeric["possible"].append(bool(record.get("possible")))
+        
+        risk = record.get("risk") or {}
+        dictionary = self.dictionary
+        dictionary["region_code"].append(record.get("region_code") or "")
+        dictionary["type"].append(record.get("type") or "")
+        dictionary["location"].append(record.get("location") or "")
+        dictionary["carrier"].append(record.get("carrier") or "")
+        dictionary["timezones"].append("; ".join(record.get("timezones") or ()))
+        dictionary["patterns"].append("; ".join(record.get("patterns") or ()))
+        dictionary["risk_level"].append(risk.get("level", ""))
+        dictionary["risk_reason"].append(risk.get("reason", ""))
+        dictionary["error"].append(record.get("error") or "")
+        self.count += 1
+    
+    def close(self):
+        pass
+    
+    def row(self, index):
+        """Return one stored row as a dict"""
+        row = {name: column[index] for name, column in self.numeric.items()}
+        row.update((name, column[index]) for name, column in self.dictionary.items())
+        return row
+    
+    def nbytes(self):
+        """Approximate memory used by the column data"""
+        return (sum(column.itemsize * len(column) for column in self.numeric.values())
+                + sum(column.nbytes() for column in self.dictionary.values()))
+    
+    @classmethod
+    def check_path(cls, path):
+        """Raise ValueError if rows cannot be exported to path in this environment"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in cls.EXPORTS:
+            raise ValueError(f"unsupported extension {extension or '(none)'}; use one of {', '.join(cls.EXPORTS)}")
+        if not load_numpy():
+            raise ValueError("NumPy is required for columnar export: pip install numpy")
+        if extension != ".npz" and not load_pyarrow():
+            raise ValueError(f"pyarrow is required for {extension} export: pip install pyarrow")
+    
+    def to_numpy(self):
+        """Return the columns as NumPy arrays; dictionary columns become codes plus a values array"""
+        np = load_numpy()
+        arrays = {name: np.frombuffer(column, dtype=column.typecode) if column else np.array([], column.typecode)
+                  for name, column in self.numeric.items()}
+        arrays["valid"] = arrays["valid"].astype(bool)
+        arrays["possible"] = arrays["possible"].astype(bool)
+        for name, column in self.dictionary.items():
+            arrays[name] = np.frombuffer(column.codes, dtype=np.int32) if column.codes else np.array([], np.int32)
+            arrays[f"{name}_values"] = np.array(column.values, dtype=str)
+        return arrays
+    
+    def to_arrow(self):
+        """Return the columns as a pyarrow Table with dictionary-typed string columns"""
+        pa = load_pyarrow()
+        arrays = self.to_numpy()
+        columns = {name: pa.array(arrays[name]) for name, _ in self.NUMERIC}
+        for name in self.DICTIONARY:
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(arrays[name], type=pa.int32()), pa.array(self.dictionary[name].values, type=pa.string()))
+        return pa.table(columns)
+    
+    def save(self, path):
+        """Export to .npz (NumPy) or .parquet/.arrow/.feather (pyarrow), chosen by extension"""
+        self.check_path(path)
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npz":
+            load_numpy().savez_compressed(path, **self.to_numpy())
+        elif extension == ".parquet":
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(self.to_arrow(), path)
+        else:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(self.to_arrow(), path)
+
+class AggregateReport:
+    """Streaming counts by country, carrier, number type and risk level
+    
+    Only the counters are kept, so memory depends on the number of distinct
+    countries and carriers, never on the input size.
+    """
+    
+    DIMENSIONS = ("country", "carrier", "type", "risk")
+    
+    def __init__(self):
+        self.count = 0
+        self.valid = 0
+        self.counts = {dimension: {} for dimension in self.DIMENSIONS}
+    
+    def write(self, record):
+        """Count one batch record"""
+        self.count += 1
+        if not record.get("valid"):
+            return
+        self.valid += 1
+        risk = record.get("risk")
+        keys = (
+            record.get("region_code") or "Unknown",
+            record.get("carrier") or "Unknown",
+            record.get("type") or "Unknown",
+            risk["level"] if risk else "Unknown",
+        )
+        for dimension, key in zip(self.DIMENSIONS, keys):
+            counts = self.counts[dimension]
+            counts[key] = counts.get(key, 0) + 1
+    
+    def close(self):
+        pass
+    
+    def summary(self, top=None):
+        """Return totals and the most common values per dimension as a dict"""
+        summary = {"records": self.count, "valid": self.valid, "invalid": self.count - self.valid}
+        for dimension, counts in self.counts.items():
+            ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            summary[dimension] = dict(ranked[:top] if top else ranked)
+        return summary
+    
+    def render(self, top=None):
+        """Render the summary as a text report"""
+        summary = self.summary(top)
+        lines = [f"📊 {summary['records']} records: {summary['valid']} valid, {summary['invalid']} invalid"]
+        for dimension in self.DIMENSIONS:
+            lines.append(f"\nBy {dimension}:")
+            for key, count in summary[dimension].items():
+                share = count / self.valid * 100 if self.valid else 0.0
+                lines.append(f"  {count:>10}  {share:5.1f}%  {key}")
+        return "\n".join(lines) + "\n"
+
+class Checkpoint:
+    """Progress of a batch run over a MappedInput, persisted atomically for --resume
+    
+    A checkpoint holds the input byte offset up to which every record has been
+    written, the output file size at that moment, the output record count and
+    the pickled state objects (de-duplicator, report, store). Runs are cut into
+    segments that drain completely before a checkpoint, so no record is ever in
+    flight, and the output is fsynced before the checkpoint file is replaced.
+    Checkpoints are pickles and must only be loaded from trusted paths.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path, signature, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.signature = signature
+        self.interval = interval
+        self.offset = 0
+        self.output_offset = 0
+        self.records = 0
+        self.state = None
+        self._saved_at = time.monotonic()
+    
+    def load(self):
+        """Restore saved progress, returning False if there is no checkpoint file
+        
+        Raises ValueError if the checkpoint was written for a different job.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        if not isinstance(saved, dict) or saved.get("version") != self.VERSION:
+            raise ValueError(f"{self.path} is not a checkpoint of this version")
+        changed = [key for key, value in self.signature.items() if saved["signature"].get(key) != value]
+        if changed:
+            raise ValueError(f"{self.path} belongs to a different job ({', '.join(changed)} changed)")
+        self.offset = saved["offset"]
+        self.output_offset = saved["output_offset"]
+        self.records = saved["records"]
+        self.state = saved["state"]
+        return True
+    
+    def due(self):
+        """Whether the checkpoint interval has passed since the last save"""
+        return time.monotonic() - self._saved_at >= self.interval
+    
+    def save(self, offset, output=None, records=0):
+        """Persist progress once every record before input offset has been written to output"""
+        if output is not None:
+            output.flush()
+            os.fsync(output.fileno())
+            self.output_offset = output.tell()
+        self.offset = offset
+        self.records = records
+        saved = {
+            "version": self.VERSION,
+            "signature": self.signature,
+            "offset": offset,
+            "output_offset": self.output_offset,
+            "records": records,
+            "state": self.state,
+        }
+        # Write a sibling file and rename it over the old one, so a crash leaves either checkpoint intact
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._saved_at = time.monotonic()
+    
+    def remove(self):
+        """Delete the checkpoint after the run has finished"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+def iter_chunks(iterable, size):
+    """Split an iterable into lists of at most size items without reading ahead"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# NumPy is optional and only imported when batched digit analysis first runs
+_numpy = None
+
+def load_numpy():
+    """Import NumPy on first use, returning None when it is not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            _numpy = False
+        else:
+            _numpy = numpy
+    return _numpy or None
+
+# pyarrow is optional and only needed for Parquet/Arrow export
+_pyarrow = None
+
+def load_pyarrow():
+    """Import pyarrow on first use, returning None when it is not installed"""
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+        except ImportError:
+            _pyarrow = False
+        else:
+            _pyarrow = pyarrow
+    return _pyarrow or None
+
+def digit_matrix(number_strs):
+    """Pack digit strings into an int8 matrix padded with -1, plus their lengths"""
+    np = load_numpy()
+    if np is None:
+        raise ImportError("NumPy is required for batched digit analysis: pip install numpy")
+    lengths = np.fromiter(map(len, number_strs), dtype=np.int64, count=len(number_strs))
+    width = int(lengths.max()) if len(number_strs) else 0
+    # "/" is the byte just below "0", so padding decodes to -1
+    packed = b"".join(s.encode("ascii").ljust(width, b"/") for s in number_strs)
+    digits = np.frombuffer(packed, dtype=np.uint8).reshape(len(number_strs), width).astype(np.int8) - 48
+    return digits, lengths
+
+def analyze_digit_matrix(digits, lengths):
+    """Compute every pattern flag and risk factor for a digit matrix at once
+
+    Returns a dict of per-row arrays matching detect_patterns()/assess_risk():
+    all_same, ascending, descending, palindrome, consecutive_pairs and short
+    are booleans; repeat_len is the length of the repeated pattern (0 if none);
+    risk_factors is the assess_risk() score.
+    """
+    np = load_numpy()
+    rows, width = digits.shape
+    columns = np.arange(width)
+    in_number = columns < lengths[:, None]
+    
+    # Neighbour comparisons, restricted to pairs inside each number
+    pair_in_number = in_number[:, 1:]
+    step = digits[:, 1:].astype(np.int16) - digits[:, :-1]
+    ascending = np.all((step == 1) | ~pair_in_number, axis=1) & (lengths > 1)
+    descending = np.all((step == -1) | ~pair_in_number, axis=1) & (lengths > 1)
+    consecutive_pairs = np.any((step == 0) & pair_in_number, axis=1)
+    all_same = np.all((digits == digits[:, :1]) | ~in_number, axis=1)
+    
+    mirror = np.clip(lengths[:, None] - 1 - columns, 0, max(width - 1, 0))
+    palindrome = np.all((digits == np.take_along_axis(digits, mirror, axis=1)) | ~in_number, axis=1)
+    
+    # Smallest period p <= n // 2 such that the first p * (n // p) digits repeat with period p
+    repeat_len = np.zeros(rows, dtype=np.int64)
+    for period in range(1, width // 2 + 1):
+        candidate = (repeat_len == 0) & (period <= lengths // 2)
+        if not candidate.any():
+            continue
+        covered = columns[period:] < (lengths // period * period)[:, None]
+        matches = np.all((digits[:, period:] == digits[:, :-period]) | ~covered, axis=1)
+        repeat_len[candidate & matches] = period
+    
+    short = lengths < 7
+    risk_factors = (2 * all_same + 2 * (ascending | descending) + short.astype(np.int64)
+                    + (repeat_len > 0).astype(np.int64))
+    return {
+        "all_same": all_same,
+        "ascending": ascending,
+        "descending": descending,
+        "palindrome": palindrome,
+        "repeat_len": repeat_len,
+        "consecutive_pairs": consecutive_pairs,
+        "short": short,
+        "risk_factors": risk_factors,
+    }
+
+def digit_labels(number_str, all_same, ascending, descending, palindrome, repeated, consecutive_pairs, short):
+    """Build detect_patterns() and assess_risk() output from precomputed flags"""
+    patterns = []
+    if all_same:
+        patterns.append("All digits are the same")
+    if ascending:
+        patterns.append("Sequential ascending digits")
+    if descending:
+        patterns.append("Sequential descending digits")
+    if palindrome:
+        patterns.append("Palindrome number")
+    if repeated:
+        patterns.append(f"Repeated pattern: {repeated}")
+    if consecutive_pairs:
+        patterns.append("Contains consecutive digit pairs")
+    
+    risk_factors = 0
+    reasons = []
+    if all_same:
+        risk_factors += 2
+        reasons.append("All digits identical")
+    if ascending or descending:
+        risk_factors += 2
+        reasons.append("Sequential digits")
+    if short:
+        risk_factors += 1
+        reasons.append("Very short number")
+    if repeated:
+        risk_factors += 1
+        reasons.append("Repeated pattern")
+    
+    if risk_factors >= 3:
+        risk = {"level": "🔴 High", "reason": "; ".join(reasons)}
+    elif risk_factors >= 2:
+        risk = {"level": "🟡 Medium", "reason": "; ".join(reasons)}
+    else:
+        risk = {"level": "🟢 Low", "reason": "Normal number pattern"}
+    return patterns, risk
+
+def analyze_digit_batch(number_strs):
+    """Vectorized detect_patterns()/assess_risk() over many national numbers
+
+    Returns a list of (patterns, risk) tuples in input order, with the same
+    labels the scalar methods produce.
+    """
+    if not number_strs:
+        return []
+    digits, lengths = digit_matrix(number_strs)
+    flags = analyze_digit_matrix(digits, lengths)
+    rows = zip(
+        number_strs, flags["all_same"].tolist(), flags["ascending"].tolist(),
+        flags["descending"].tolist(), flags["palindrome"].tolist(), flags["repeat_len"].tolist(),
+        flags["consecutive_pairs"].tolist(), flags["short"].tolist(),
+    )
+    return [
+        digit_labels(number_str, all_same, ascending, descending, palindrome,
+                     number_str[:repeat_len] if repeat_len else None, pairs, short)
+        for number_str, all_same, ascending, descending, palindrome, repeat_len, pairs, short in rows
+    ]
+
+class PrefixCache:
+    """Bounded LRU cache for prefix-resolved lookups with hit/miss/eviction counters"""
+    
+    def __init__(self, maxsize=DEFAULT_PREFIX_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Latest cache size reported by each pool worker, by process id
+        self.worker_sizes = {}
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def pop_counters(self):
+        """Return (hits, misses, evictions) since the last call, reset them, and add (pid, size)"""
+        counters = (self.hits, self.misses, self.evictions, (os.getpid(), len(self._entries)))
+        self.hits = self.misses = self.evictions = 0
+        return counters
+    
+    def merge_counters(self, counters):
+        """Add counters reported by another cache, e.g. from a pool worker"""
+        hits, misses, evictions, (pid, size) = counters
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+        self.worker_sizes[pid] = size
+    
+    def stats(self):
+        """Return cache size and counters as a dict
+        
+        When pool workers did the lookups, each has its own cache, so their
+        sizes are listed instead of this process's unused one.
+        """
+        lookups = self.hits + self.misses
+        stats = {}
+        if self._entries or not self.worker_sizes:
+            stats["size"] = len(self._entries)
+        if self.worker_sizes:
+            stats["worker_sizes"] = [size for _, size in sorted(self.worker_sizes.items())]
+        stats.update({
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
         })
+        return stats
+
+class ResultCache:
+    """Persistent SQLite cache of analysis results keyed by E.164 and phonenumbers metadata version"""
+    
+    WRITE_BATCH = 500
+    
+    def __init__(self, path, ttl=DEFAULT_RESULT_CACHE_TTL, max_entries=DEFAULT_RESULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = phonenumbers.__version__
+        self.hits = 0
+        self.misses = 0
+        self._pending = []
+        # Opened on first use so a connection is never carried across a fork into pool workers
+        self._conn = None
+    
+    def _connect(self):
+        if self._conn is None:
+            import sqlite3
+            # Serve mode hands the tool between request threads, always under one lock
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            # WAL lets any number of readers proceed while one writer commits
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, payload TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_stored_at ON results (stored_at)")
+            self._conn = conn
+        return self._conn
+    
+    def key_for(self, e164):
+        """Build the cache key for an E.164 number under the current metadata version"""
+        return f"{self.version}:{e164}"
+    
+    def get(self, e164):
+        """Return the cached payload for an E.164 number, or None if missing or expired"""
+        row = self._connect().execute(
+            "SELECT stored_at, payload FROM results WHERE key = ?", (self.key_for(e164),)
+        ).fetchone()
+        if row is None or row[0] < time.time() - self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[1])
+    
+    def pop_counters(self):
+        """Return (hits, misses) since the last call and reset them"""
+        counters = (self.hits, self.misses)
+        self.hits = self.misses = 0
+        return counters
+    
+    def merge_counters(self, counters):
+        """Add counters reported by another cache, e.g. from a pool worker"""
+        hits, misses = counters
+        self.hits += hits
+        self.misses += misses
+    
+    def stats(self):
+        """Return cache counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+    
+    def put(self, e164, payload):
+        """Queue a payload for storage; writes are committed in batches"""
+        self._pending.append((self.key_for(e164), time.time(), json.dumps(payload, ensure_ascii=False)))
+        if len(self._pending) >= self.WRITE_BATCH:
+            self.flush()
+    
+    def flush(self):
+        """Commit queued writes in a single transaction"""
+        if not self._pending:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", self._pending)
+        self._pending = []
+    
+    def prune(self):
+        """Drop expired entries, then the oldest entries beyond max_entries"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM results WHERE stored_at < ?", (time.time() - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY stored_at LIMIT ?)", (excess,)
+                )
+    
+    def close(self):
+        """Flush pending writes, apply eviction and close the database"""
+        self.flush()
+        # Pool workers do the lookups in parallel runs, so connect here if this process never did
+        self.prune()
+        self._conn.close()
+        self._conn = None
+
+class StageTimer:
+    """Context manager that records one timed stage into a Metrics object"""
+    
+    __slots__ = ("metrics", "name", "items", "started")
+    
+    def __init__(self, metrics, name, items):
+        self.metrics = metrics
+        self.name = name
+        self.items = items
+    
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter_ns() - self.started, self.items)
+        return False
+
+class Metrics:
+    """Per-stage timing histograms and event counters collected for --profile
+    
+    Each stage keeps a count, total, maximum and a histogram of per-item
+    durations in log-scale nanosecond buckets (four per power of two), so
+    snapshots from pool workers can be merged by simple addition.
+    """
+    
+    BUCKETS = 4 * 48
+    
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+    
+    def __bool__(self):
+        return True
+    
+    def stage(self, name, items=1):
+        """Time a block of work covering the given number of items"""
+        return StageTimer(self, name, items)
+    
+    def observe(self, name, elapsed_ns, items=1):
+        """Record a duration for a stage; batches are bucketed by their per-item average"""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = [0, 0, 0, [0] * self.BUCKETS]
+        stage[0] += items
+        stage[1] += elapsed_ns
+        per_item = elapsed_ns // items if items else elapsed_ns
+        if per_item > stage[2]:
+            stage[2] = per_item
+        stage[3][self._bucket(per_item)] += items
+    
+    def count(self, name, amount=1):
+        """Increment an event counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def pop(self):
+        """Return everything recorded since the last call and reset"""
+        snapshot = {"stages": self.stages, "counters": self.counters}
+        self.stages = {}
+        self.counters = {}
+        return snapshot
+    
+    def merge(self, snapshot):
+        """Add a snapshot returned by pop(), e.g. from a pool worker"""
+        if not snapshot:
+            return
+        for name, (count, total, maximum, buckets) in snapshot["stages"].items():
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [0, 0, 0, [0] * self.BUCKETS]
+            stage[0] += count
+            stage[1] += total
+            stage[2] = max(stage[2], maximum)
+            stage[3] = [a + b for a, b in zip(stage[3], buckets)]
+        for name, amount in snapshot["counters"].items():
+            self.count(name, amount)
+    
+    @classmethod
+    def _bucket(cls, value):
+        # Octave from the bit length, quarter-octave from the two bits below the leading one
+        length = value.bit_length()
+        if length < 3:
+            return value
+        return min(length * 4 + ((value >> (length - 3)) & 3), cls.BUCKETS - 1)
+    
+    @staticmethod
+    def _bucket_limit(index):
+        # Largest value that falls into a bucket; indexes 4-11 are never used
+        if index < 12:
+            return min(index, 3)
+        length, quarter = divmod(index, 4)
+        return ((5 + quarter) << (length - 3)) - 1
+    
+    def _quantile(self, buckets, count, maximum, fraction):
+        # Upper bound of the bucket holding the requested rank, in microseconds
+        rank = max(1, round(fraction * count))
+        seen = 0
+        for index, items in enumerate(buckets):
+            seen += items
+            if seen >= rank:
+                return round(min(self._bucket_limit(index), maximum) / 1000, 2)
+        return 0.0
+    
+    def summary(self):
+        """Return stages and counters as a JSON-serializable dict"""
+        stages = {}
+        for name, (count, total, maximum, buckets) in self.stages.items():
+            stages[name] = {
+                "count": count,
+                "total_ms": round(total / 1e6, 3),
+                "mean_us": round(total / count / 1000, 2) if count else 0.0,
+                "p50_us": self._quantile(buckets, count, maximum, 0.50),
+                "p90_us": self._quantile(buckets, count, maximum, 0.90),
+                "p99_us": self._quantile(buckets, count, maximum, 0.99),
+                "max_us": round(maximum / 1000, 2),
+            }
+        return {"stages": stages, "counters": dict(sorted(self.counters.items()))}
+    
+    def render(self, summary=None):
+        """Render a summary as a text table"""
+        summary = summary or self.summary()
+        lines = [f"{'stage':<16} {'count':>9} {'total ms':>11} {'mean us':>10} "
+                 f"{'p50 us':>9} {'p99 us':>9} {'max us':>10}"]
+        for name, stage in summary["stages"].items():
+            lines.append(f"{name:<16} {stage['count']:>9} {stage['total_ms']:>11.1f} {stage['mean_us']:>10.1f} "
+                         f"{stage['p50_us']:>9.1f} {stage['p99_us']:>9.1f} {stage['max_us']:>10.1f}")
+        for name, amount in summary["counters"].items():
+            lines.append(f"{name:<16} {amount:>9}")
+        return "\n".join(lines)
+
+class NullMetrics:
+    """Drop-in Metrics replacement that records nothing, used when profiling is off"""
+    
+    _STAGE = nullcontext()
+    
+    def __bool__(self):
+        return False
+    
+    def stage(self, name, items=1):
+        return self._STAGE
+    
+    def observe(self, name, elapsed_ns, items=1):
+        pass
+    
+    def count(self, name, amount=1):
+        pass
+    
+    def pop(self):
+        return None
+    
+    def merge(self, snapshot):
+        pass
+    
+    def summary(self):
+        return {"stages": {}, "counters": {}}
+
+NULL_METRICS = NullMetrics()
+
+def parse_phone_number(phone_number, default_region=None):
+    """Parse a raw phone number, falling back to reading a leading "00" as the international prefix
+    
+    Numbers without a "+" are read in default_region. "00" is the most common
+    international prefix but not every region's (the US uses 011), so a
+    number like 0014155552671 that does not parse to a valid number is
+    retried as +14155552671.
+    """
+    try:
+        parsed_number = phonenumbers.parse(phone_number, default_region)
+    except phonenumbers.NumberParseException:
+        if not phone_number.startswith("00"):
+            raise
+        parsed_number = None
+    if phone_number.startswith("00") and (parsed_number is None or not phonenumbers.is_valid_number(parsed_number)):
+        try:
+            return phonenumbers.parse("+" + phone_number[2:], None)
+        except phonenumbers.NumberParseException:
+            if parsed_number is None:
+                raise
+    return parsed_number
+
+def canonical_number(parsed_number):
+    """E.164 form of a parsed number, with ";ext=" and the extension if it has one"""
+    e164 = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
+    if parsed_number.extension:
+        e164 += ";ext=" + parsed_number.extension
+    return e164
+
+class ExactDeduplicator:
+    """Remembers every key it has seen; memory grows with the number of distinct keys"""
+    
+    def __init__(self):
+        self._seen = set()
+    
+    def add(self, key):
+        """Record a key, returning False if it was already seen"""
+        digits = key[1:]
+        if key[:1] == "+" and digits[:1] in "123456789" and digits.isascii() and digits.isdigit():
+            # E.164 numbers never start with 0 after the "+", so an int is an exact, smaller key;
+            # unparseable raw lines such as "+0123" are kept as text so they cannot collide with one
+            key = int(digits)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+    
+    def stats(self):
+        return {"mode": "exact", "entries": len(self._seen)}
+
+class BloomDeduplicator:
+    """Fixed-size Bloom filter for inputs too large to remember exactly
+    
+    Memory is set by the expected number of distinct keys and the error rate,
+    not by the input size. A false positive drops a number that was not a
+    duplicate, so error_rate is the fraction of unique numbers that may be lost.
+    """
+    
+    def __init__(self, capacity=DEFAULT_DEDUP_CAPACITY, error_rate=DEFAULT_DEDUP_ERROR_RATE):
+        import math
+        from hashlib import blake2b
+        self._blake2b = blake2b
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.entries = 0
+    
+    def add(self, key):
+        """Record a key, returning False if it was (probably) already seen"""
+        digest = self._blake2b(key.encode("utf-8"), digest_size=16).digest()
+        # Double hashing: k bit positions from two independent 64-bit hashes
+        position = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        bits = self._bits
+        size = self.size
+        new = False
+        for _ in range(self.hashes):
+            position = (position + step) % size
+            byte = position >> 3
+            mask = 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.entries += 1
+        return new
+    
+    def stats(self):
+        return {"mode": "bloom", "entries": self.entries, "capacity": self.capacity,
+                "error_rate": self.error_rate, "bytes": len(self._bits), "hashes": self.hashes}
+
+class InputNormalizer:
+    """Front-end stage that rewrites raw numbers to E.164 and drops repeats before analysis
+    
+    Unparseable lines pass through unchanged, so they still produce an error
+    record, and are de-duplicated by their exact text.
+    """
+    
+    def __init__(self, default_region=None, deduplicator=None, metrics=NULL_METRICS):
+        self.default_region = default_region
+        self.deduplicator = deduplicator
+        self.metrics = metrics
+        self.inputs = 0
+        self.duplicates = 0
+        self.unparseable = 0
+    
+    def normalize(self, phone_number):
+        """Return the canonical form of a raw number, or the raw text if it cannot be parsed"""
+        try:
+            return canonical_number(parse_phone_number(phone_number, self.default_region))
+        except phonenumbers.NumberParseException:
+            self.unparseable += 1
+            return phone_number
+    
+    def iter(self, numbers):
+        """Yield normalized numbers, skipping any already yielded"""
+        deduplicator = self.deduplicator
+        metrics = self.metrics
+        for phone_number in numbers:
+            self.inputs += 1
+            with metrics.stage("normalize"):
+                normalized = self.normalize(phone_number)
+                new = deduplicator is None or deduplicator.add(normalized)
+            if new:
+                yield normalized
+            else:
+                self.duplicates += 1
+                metrics.count("duplicates")
+    
+    def iter_unique_records(self, records):
+        """Drop records whose input was already seen, for numbers normalized inside pool workers"""
+        deduplicator = self.deduplicator
+        for record in records:
+            if deduplicator.add(record["input"]):
+                yield record
+            else:
+                self.duplicates += 1
+                self.metrics.count("duplicates")
+    
+    def pop_counters(self):
+        """Return (inputs, unparseable) since the last call and reset them"""
+        counters = (self.inputs, self.unparseable)
+        self.inputs = self.unparseable = 0
+        return counters
+    
+    def merge_counters(self, counters):
+        """Add counters reported by a normalizer in a pool worker"""
+        inputs, unparseable = counters
+        self.inputs += inputs
+        self.unparseable += unparseable
+    
+    def stats(self):
+        """Return input, output and collapsed record counts as a dict"""
+        stats = {
+            "inputs": self.inputs,
+            "unique": self.inputs - self.duplicates,
+            "duplicates": self.duplicates,
+            "unparseable": self.unparseable,
+        }
+        if self.deduplicator is not None:
+            stats["dedup"] = self.deduplicator.stats()
+        return stats
+
+DEDUPLICATORS = {
+    "exact": ExactDeduplicator,
+    "bloom": BloomDeduplicator,
+}
+
+def load_prefix_tables():
+    """Import the geocoder, carrier and timezone modules with their prefix tables
+
+    Returns (geocoder, carrier, timezone, tables, longest_prefix) where tables
+    holds the raw prefix dicts. The geocoder data alone takes a few hundred
+    milliseconds to import, so this only happens when a lookup needs it.
+    """
+    from phonenumbers import geocoder, carrier, timezone
+    from phonenumbers.geodata import GEOCODE_DATA, GEOCODE_LONGEST_PREFIX
+    from phonenumbers.carrierdata import CARRIER_DATA, CARRIER_LONGEST_PREFIX
+    from phonenumbers.tzdata import TIMEZONE_DATA, TIMEZONE_LONGEST_PREFIX
+    tables = (GEOCODE_DATA, CARRIER_DATA, TIMEZONE_DATA)
+    longest_prefix = max(GEOCODE_LONGEST_PREFIX, CARRIER_LONGEST_PREFIX, TIMEZONE_LONGEST_PREFIX)
+    return geocoder, carrier, timezone, tables, longest_prefix
+
+class LibraryPrefixSource:
+    """Resolve location, carrier and timezones through the phonenumbers lookup functions"""
+    
+    def __init__(self):
+        self._loaded = None
+    
+    def _load(self):
+        if self._loaded is None:
+            self._loaded = load_prefix_tables()
+        return self._loaded
+    
+    def matching_prefix(self, e164_format):
+        """Return the longest leading digits of an E.164 number found in any geocoder, carrier or timezone table"""
+        (geocode_data, carrier_data, timezone_data), longest_prefix = self._load()[3:]
+        digits = e164_format[1:]
+        for length in range(min(len(digits), longest_prefix), 0, -1):
+            prefix = digits[:length]
+            if prefix in geocode_data or prefix in carrier_data or prefix in timezone_data:
+                return prefix
+        return ""
+    
+    def country_name(self, parsed_number):
+        """Return geocoder.country_name_for_number(parsed_number, "en")"""
+        return self._load()[0].country_name_for_number(parsed_number, "en")
+    
+    def resolve(self, result):
+        """Return (location, carrier, timezones) for a valid LookupResult"""
+        geocoder, carrier, timezone = self._load()[:3]
+        parsed_number = result.parsed
+        return (
+            geocoder.description_for_number(parsed_number, "en") or "Unknown",
+            carrier.name_for_number(parsed_number, "en") or "Unknown",
+            tuple(timezone.time_zones_for_number(parsed_number)),
+        )
+
+class PrefixIndex:
+    """Memory-mapped sorted-array index of the geocoder, carrier and timezone prefix tables
+
+    The file holds, for every table and prefix length, a sorted array of
+    integer prefixes and a parallel array of string ids, so a lookup is a
+    binary search per prefix length without loading the library tables.
+    Answers follow the same rules as geocoder.description_for_number(),
+    carrier.name_for_number() and timezone.time_zones_for_number() for "en".
+    """
+    
+    TABLES = ("geocode", "carrier", "timezone")
+    
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(PREFIX_INDEX_MAGIC)]) != PREFIX_INDEX_MAGIC:
+            raise ValueError(f"{path} is not a prefix index file")
+        header_len = int.from_bytes(view[8:12], "little")
+        header = json.loads(bytes(view[12:12 + header_len]).decode("utf-8"))
+        # Section offsets are relative to the 8-byte aligned start of the data area
+        base = 12 + header_len
+        base += -base % 8
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {header['byteorder']}-endian machine")
+        self.version = header["phonenumbers_version"]
+        self.country_names = header["country_names"]
+        self.longest = header["longest"]
+        self._sections = {}
+        for name, (offset, count) in header["sections"].items():
+            table, length = name.split(":")
+            offset += base
+            keys = view[offset:offset + 8 * count].cast("Q")
+            values = view[offset + 8 * count:offset + 12 * count].cast("I")
+            self._sections[(table, int(length))] = (keys, values)
+        offsets_at, string_count, blob_at = header["strings"]
+        offsets_at += base
+        self._string_offsets = view[offsets_at:offsets_at + 4 * (string_count + 1)].cast("I")
+        self._blob_at = base + blob_at
+        self._view = view
+    
+    def _string(self, string_id):
+        start = self._blob_at + self._string_offsets[string_id]
+        end = self._blob_at + self._string_offsets[string_id + 1]
+        return bytes(self._view[start:end]).decode("utf-8")
+    
+    def _find(self, table, prefix):
+        """Return the string id stored for an exact prefix, or None"""
+        section = self._sections.get((table, len(prefix)))
+        if section is None:
+            return None
+        keys, values = section
+        key = int(prefix)
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return values[position]
+        return None
+    
+    def _longest(self, table, digits):
+        """Return (prefix, string id) for the longest prefix of digits present in table"""
+        for length in range(min(len(digits), self.longest[table]), 0, -1):
+            string_id = self._find(table, digits[:length])
+            if string_id is not None:
+                return digits[:length], string_id
+        return "", None
+    
+    def describe(self, table, digits):
+        """Return the value stored for the longest matching prefix, or an empty string"""
+        string_id = self._longest(table, digits)[1]
+        return "" if string_id is None else self._string(string_id)
+    
+    def matching_prefix(self, e164_format):
+        """Return the longest leading digits of an E.164 number found in any table"""
+        digits = e164_format[1:]
+        return max((self._longest(table, digits)[0] for table in self.TABLES), key=len)
+    
+    def country_name(self, parsed_number):
+        """Same answer as geocoder.country_name_for_number(parsed_number, "en")"""
+        region_codes = phonenumbers.region_codes_for_country_code(parsed_number.country_code)
+        if len(region_codes) == 1:
+            return self.country_names.get(region_codes[0], "")
+        valid_region = "ZZ"
+        for region_code in region_codes:
+            if phonenumbers.is_valid_number_for_region(parsed_number, region_code):
+                if valid_region != "ZZ":
+                    return ""
+                valid_region = region_code
+        return self.country_names.get(valid_region, "")
+    
+    def resolve(self, result):
+        """Return (location, carrier, timezones) for a valid LookupResult"""
+        parsed_number = result.parsed
+        number_type = result.number_type
+        country_code = result.country_code
+        digits = result.e164_format[1:]
+        unknown = number_type == phonenumbers.PhoneNumberType.UNKNOWN
+        geographical = phonenumbers.is_number_type_geographical(number_type, country_code)
+        
+        if unknown:
+            location = ""
+        elif not geographical:
+            location = self._country_name(result)
+        else:
+            geo_digits = digits
+            mobile_token = phonenumbers.country_mobile_token(country_code)
+            national_number = phonenumbers.national_significant_number(parsed_number)
+            if mobile_token and national_number.startswith(mobile_token):
+                # The geocoder looks up mobile numbers without their mobile token
+                region = phonenumbers.region_code_for_country_code(country_code)
+                try:
+                    stripped = phonenumbers.parse(national_number[len(mobile_token):], region)
+                except phonenumbers.NumberParseException:
+                    stripped = parsed_number
+                geo_digits = phonenumbers.format_number(stripped, phonenumbers.PhoneNumberFormat.E164)[1:]
+            location = self.describe("geocode", geo_digits) or self._country_name(result)
+        
+        if number_type in (phonenumbers.PhoneNumberType.MOBILE,
+                           phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
+                           phonenumbers.PhoneNumberType.PAGER):
+            carrier_name = self.describe("carrier", digits)
+        else:
+            carrier_name = ""
+        
+        if unknown:
+            timezones = UNKNOWN_TIMEZONES
+        elif not geographical:
+            timezones = UNKNOWN_TIMEZONES
+            code = str(country_code)
+            for length in range(self.longest["timezone"], 0, -1):
+                string_id = self._find("timezone", code[:1 + length])
+                if string_id is not None:
+                    timezones = tuple(self._string(string_id).split("&"))
+                    break
+        else:
+            string_id = self._longest("timezone", digits)[1]
+            timezones = UNKNOWN_TIMEZONES if string_id is None else tuple(self._string(string_id).split("&"))
+        
+        return location or "Unknown", carrier_name or "Unknown", timezones
+    
+    def _country_name(self, result):
+        if result.country_name is None:
+            result.country_name = self.country_name(result.parsed)
+        return result.country_name
+    
+    def close(self):
+        """Unmap the index file"""
+        self._sections = {}
+        self._string_offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+def build_prefix_index(path):
+    """Compile the phonenumbers geocoder, carrier and timezone tables into a prefix index file"""
+    from phonenumbers.geodata.locale import LOCALE_DATA
+    GEOCODE_DATA, CARRIER_DATA, TIMEZONE_DATA = load_prefix_tables()[3]
+    
+    strings = {}
+    def string_id(value):
+        return strings.setdefault(value, len(strings))
+    
+    # Lookups in "en" skip prefixes that have no English name, so leave those out
+    tables = {
+        "geocode": {prefix: string_id(names["en"]) for prefix, names in GEOCODE_DATA.items() if "en" in names},
+        "carrier": {prefix: string_id(names["en"]) for prefix, names in CARRIER_DATA.items() if "en" in names},
+        "timezone": {prefix: string_id("&".join(zones)) for prefix, zones in TIMEZONE_DATA.items()},
+    }
+    country_names = {}
+    for region_code, names in LOCALE_DATA.items():
+        name = names.get("en", "")
+        if name.startswith("*"):
+            name = names.get(name[1:], "")
+        country_names[region_code] = name
+    
+    # Data area: per-table key/value arrays, then string offsets and the UTF-8 string blob
+    data = bytearray()
+    def append(chunk):
+        data.extend(b"\0" * (-len(data) % 8))
+        offset = len(data)
+        data.extend(chunk)
+        return offset
+    
+    sections = {}
+    for table, entries in tables.items():
+        by_length = {}
+        for prefix, value in entries.items():
+            by_length.setdefault(len(prefix), []).append((int(prefix), value))
+        for length, pairs in sorted(by_length.items()):
+            pairs.sort()
+            keys = array("Q", [key for key, _ in pairs])
+            values = array("I", [value for _, value in pairs])
+            sections[f"{table}:{length}"] = [append(keys.tobytes() + values.tobytes()), len(pairs)]
+    
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    offsets_at = append(offsets.tobytes())
+    blob_at = append(b"".join(encoded))
+    
+    header = json.dumps({
+        "phonenumbers_version": phonenumbers.__version__,
+        "byteorder": sys.byteorder,
+        "country_names": country_names,
+        "longest": {table: max(map(len, entries)) for table, entries in tables.items()},
+        "sections": sections,
+        "strings": [offsets_at, len(encoded), blob_at],
+    }).encode("utf-8")
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREFIX_INDEX_MAGIC + len(header).to_bytes(4, "little") + header)
+        f.write(b"\0" * (-f.tell() % 8))
+        f.write(data)
+    os.replace(tmp_path, path)
+    return {table: len(entries) for table, entries in tables.items()}
+
+def index_verification_numbers(variants=INDEX_VERIFY_VARIANTS, seed=0):
+    """Yield a deterministic sample of numbers covering every region and number type"""
+    rng = random.Random(seed)
+    examples = []
+    for region_code in sorted(phonenumbers.SUPPORTED_REGIONS):
+        for number_type in NUMBER_TYPE_LABELS:
+            examples.append(phonenumbers.example_number_for_type(region_code, number_type))
+    for country_code in sorted(phonenumbers.COUNTRY_CODES_FOR_NON_GEO_REGIONS):
+        examples.append(phonenumbers.example_number_for_non_geo_entity(country_code))
+    
+    for example in examples:
+        if example is None:
+            continue
+        e164 = phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164)
+        yield e164
+        # Vary the trailing digits to reach neighbouring prefixes
+        for _ in range(variants):
+            changed = rng.randint(1, min(5, len(str(example.national_number))))
+            yield e164[:-changed] + "".join(rng.choice("0123456789") for _ in range(changed))
+
+def verify_prefix_index(index, numbers):
+    """Compare index answers with the phonenumbers library for every valid number
+
+    Returns (checked, mismatches) where mismatches is a list of
+    (number, library_answer, index_answer) tuples.
+    """
+    reference = PhoneLookupTool(prefix_cache_size=0)
+    checked = 0
+    mismatches = []
+    for phone_number in numbers:
+        result = reference.lookup(phone_number, advanced=False)
+        if not result.valid:
+            continue
+        checked += 1
+        expected = (result.location, result.carrier, tuple(result.timezones))
+        actual = index.resolve(result)
+        if actual != expected:
+            mismatches.append((phone_number, expected, actual))
+    return checked, mismatches
+
+# Phone validation APIs used for enrichment. "{key}" is filled from "key" or the
+# "key_env" environment variable, "{number}" with the URL-quoted E.164 number and
+# "{digits}" with the same number without the leading "+". asyncio and requests
+# are imported on first use to keep startup fast.
+DEFAULT_PROVIDERS = [
+    {
+        "name": "NumVerify",
+        "url": "http://apilayer.net/api/validate?access_key={key}&number={digits}",
+        "key_env": "NUMVERIFY_API_KEY",
+        "concurrency": 4,
+        "rate": 5,
+    },
+    {
+        "name": "AbstractAPI",
+        "url": "https://phonevalidation.abstractapi.com/v1/?api_key={key}&phone={digits}",
+        "key_env": "ABSTRACTAPI_API_KEY",
+        "concurrency": 2,
+        "rate": 1,
+    },
+]
+
+def load_providers(path=None):
+    """Load enrichment provider settings from a JSON file, or the built-in defaults"""
+    if path is None:
+        return [dict(provider) for provider in DEFAULT_PROVIDERS]
+    with open(path, "r", encoding="utf-8") as f:
+        providers = json.load(f)
+    for provider in providers:
+        if "name" not in provider or "url" not in provider:
+            raise ValueError(f"{path}: every provider needs a name and a url")
+        for setting in ("concurrency", "rate", "burst", "timeout"):
+            value = provider.get(setting)
+            if value is not None and not (isinstance(value, (int, float)) and value > 0):
+                raise ValueError(f"{path}: provider {provider['name']!r}: {setting} must be a positive number")
+        retries = provider.get("retries")
+        if retries is not None and not (isinstance(retries, int) and retries >= 0):
+            raise ValueError(f"{path}: provider {provider['name']!r}: retries must be 0 or a positive number")
+    return providers
+
+def provider_key(provider):
+    """Return the API key configured for a provider, or None"""
+    return provider.get("key") or os.environ.get(provider.get("key_env", "")) or None
+
+class TokenBucket:
+    """Asyncio token bucket allowing rate requests per second with bursts up to burst"""
+    
+    def __init__(self, rate, burst=None):
+        import asyncio
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        import asyncio
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class Enricher:
+    """Concurrent enrichment of numbers against HTTP validation providers
+
+    Requests go through one pooled requests.Session on a thread pool driven by
+    asyncio. Each provider has its own concurrency limit and token bucket, failed
+    requests are retried with exponential backoff, and identical requests that
+    are already in flight share one HTTP call. Every batch runs on the same event
+    loop, so limits and rates hold across a whole run rather than per batch.
+    """
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, providers, session, timeout=DEFAULT_ENRICH_TIMEOUT, retries=DEFAULT_ENRICH_RETRIES):
+        # Providers that need a key but have none configured are skipped
+        self.providers = [
+            provider for provider in providers
+            if "{key}" not in provider["url"] or provider_key(provider)
+        ]
+        self.session = session
+        self.timeout = timeout
+        self.retries = retries
+        self.http_calls = 0
+        self._executor = None
+        self._loop = None
+        self._limits = None
+        self._in_flight = {}
+    
+    def _pool(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            from requests.adapters import HTTPAdapter
+            connections = max(1, sum(provider.get("concurrency", 4) for provider in self.providers))
+            adapter = HTTPAdapter(pool_connections=len(self.providers) or 1, pool_maxsize=connections)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            self._executor = ThreadPoolExecutor(max_workers=connections, thread_name_prefix="enrich")
+        return self._executor
+    
+    def url_for(self, provider, e164):
+        """Build the request URL for one number"""
+        return provider["url"].format(
+            key=quote(provider_key(provider) or ""), number=quote(e164), digits=e164.lstrip("+"),
+        )
+    
+    async def _fetch(self, provider, e164):
+        """Fetch one provider answer, honouring its limits and retrying transient failures"""
+        import asyncio
+        import requests
+        semaphore, bucket = self._limits[provider["name"]]
+        loop = asyncio.get_running_loop()
+        url = self.url_for(provider, e164)
+        timeout = provider.get("timeout", self.timeout)
+        # Always make at least one attempt, whatever a provider file says
+        retries = max(0, provider.get("retries", self.retries))
+        
+        for attempt in range(retries + 1):
+            delay = 0.5 * 2 ** attempt
+            async with semaphore:
+                await bucket.acquire()
+                self.http_calls += 1
+                try:
+                    response = await loop.run_in_executor(
+                        self._pool(), partial(self.session.get, url, timeout=timeout)
+                    )
+                except requests.RequestException as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code not in self.RETRY_STATUSES:
+                        if not response.ok:
+                            return {"status": "error", "error": f"HTTP {response.status_code}"}
+                        try:
+                            return {"status": "ok", "data": response.json()}
+                        except ValueError:
+                            return {"status": "ok", "data": response.text}
+                    error = f"HTTP {response.status_code}"
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+            if attempt < retries:
+                await asyncio.sleep(delay)
+        return {"status": "error", "error": error}
+    
+    async def enrich_many(self, numbers):
+        """Enrich E.164 numbers concurrently, returning one {provider: answer} dict per number"""
+        import asyncio
+        if self._limits is None:
+            self._limits = {
+                provider["name"]: (asyncio.Semaphore(provider.get("concurrency", 4)),
+                                   TokenBucket(provider.get("rate", 5), provider.get("burst")))
+                for provider in self.providers
+            }
+        in_flight = self._in_flight
+        
+        def request(provider, e164):
+            # Duplicate numbers share the task already fetching them
+            key = (provider["name"], e164)
+            task = in_flight.get(key)
+            if task is None:
+                task = in_flight[key] = asyncio.ensure_future(self._fetch(provider, e164))
+                task.add_done_callback(lambda _: in_flight.pop(key, None))
+            return task
+        
+        async def enrich_one(e164):
+            answers = await asyncio.gather(*(request(provider, e164) for provider in self.providers))
+            return {provider["name"]: answer for provider, answer in zip(self.providers, answers)}
+        
+        return await asyncio.gather(*(enrich_one(e164) for e164 in numbers))
+    
+    def enrich_batch(self, numbers):
+        """Blocking wrapper around enrich_many()"""
+        if not numbers or not self.providers:
+            return [{} for _ in numbers]
+        if self._loop is None:
+            import asyncio
+            # One loop for the Enricher's lifetime; the semaphores and buckets are bound to it
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.enrich_many(numbers))
+    
+    def close(self):
+        """Shut down the request thread pool and event loop"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+# Per-process tool used by pool workers; created once by _init_worker
+_worker_tool = None
+
+def _init_worker(options):
+    """Create the worker's PhoneLookupTool so metadata is loaded once per process"""
+    global _worker_tool
+    _worker_tool = PhoneLookupTool(**options)
+
+# Input files mapped by this worker, by path
+_worker_inputs = {}
+
+def _process_chunk(numbers, validate_only=False):
+    """Analyze a chunk of numbers inside a pool worker"""
+    records = _worker_tool.analyze_chunk(numbers, validate_only)
+    # Workers exit without cleanup hooks, so commit cached results with every chunk
+    if _worker_tool.result_cache is not None:
+        _worker_tool.result_cache.flush()
+    return records, _worker_tool.pop_counters()
+
+def _process_range(path, start, end, validate_only=False, normalize=False):
+    """Read and analyze one byte range of a memory-mapped input file inside a pool worker"""
+    mapped = _worker_inputs.get(path)
+    if mapped is None:
+        mapped = _worker_inputs[path] = MappedInput(path)
+    numbers = mapped.iter_range(start, end)
+    normalizer = None
+    if normalize:
+        # De-duplication needs every record, so it happens in the parent
+        normalizer = InputNormalizer(_worker_tool.default_region, metrics=_worker_tool.metrics)
+        numbers = normalizer.iter(numbers)
+    records, counters = _process_chunk(list(numbers), validate_only)
+    if normalizer is not None:
+        counters["normalizer"] = normalizer.pop_counters()
+    return records, counters
+
+def _process_block(block, start, stop, validate_only=False):
+    """Enumerate and analyze one slice of a NumberBlock inside a pool worker"""
+    return _process_chunk(list(block.numbers(start, stop)), validate_only)
+
+class LookupResult:
+    """Structured result of analyzing one phone number, shared by every analysis stage"""
+    
+    __slots__ = (
+        "input", "parsed", "error", "valid", "possible", "number", "national_format",
+        "e164_format", "number_type", "type", "location", "carrier", "timezones",
+        "country_code", "region_code", "national_number", "digits", "patterns", "risk",
+        "cache_key", "country_name",
+    )
+    
+    INFO_FIELDS = (
+        "number", "national_format", "e164_format", "valid", "possible", "location",
+        "carrier", "timezones", "country_code", "region_code", "national_number", "type",
+    )
+    
+    def __init__(self, phone_number):
+        self.input = phone_number
+        self.parsed = None
+        self.error = None
+        self.valid = False
+        self.possible = False
+        self.number = None
+        self.national_format = None
+        self.e164_format = None
+        self.number_type = None
+        self.type = None
+        self.location = None
+        self.carrier = None
+        self.timezones = None
+        self.country_code = None
+        self.region_code = None
+        self.national_number = None
+        self.digits = None
+        self.patterns = None
+        self.risk = None
+        self.cache_key = None
+        # Filled on demand by PhoneLookupTool.country_name_of()
+        self.country_name = None
+    
+    def to_cache(self):
+        """Return every computed field except the raw input and parsed object"""
+        return {field: getattr(self, field) for field in self.__slots__
+                if field not in ("input", "parsed", "cache_key")}
+    
+    @classmethod
+    def from_cache(cls, phone_number, payload):
+        """Rebuild a result for phone_number from a result cache payload"""
+        result = cls(phone_number)
+        for field, value in payload.items():
+            # Ignore fields written by other versions of this tool
+            if field in cls.__slots__:
+                setattr(result, field, value)
+        return result
+    
+    def info(self):
+        """Return the basic lookup fields as a dict"""
+        return {field: getattr(self, field) for field in self.INFO_FIELDS}
+    
+    def to_record(self):
+        """Return a JSON-serializable record of the analysis"""
+        record = {"input": self.input}
+        if not self.valid:
+            record["valid"] = False
+            record["error"] = self.error
+            return record
+        record.update(self.info())
+        if self.patterns is not None:
+            record["patterns"] = self.patterns
+            record["risk"] = self.risk
+        return record
+
+class PhoneLookupTool:
+    def __init__(self, prefix_cache_size=DEFAULT_PREFIX_CACHE_SIZE, cache_db=None,
+                 cache_ttl=DEFAULT_RESULT_CACHE_TTL, cache_max_entries=DEFAULT_RESULT_CACHE_MAX_ENTRIES,
+                 prefix_index=None, providers_file=None, enrich_timeout=DEFAULT_ENRICH_TIMEOUT,
+                 enrich_retries=DEFAULT_ENRICH_RETRIES, profile=False, default_region=None):
+        # Constructor arguments, replayed in pool workers
+        self.options = {
+            "prefix_cache_size": prefix_cache_size,
+            "cache_db": cache_db,
+            "cache_ttl": cache_ttl,
+            "cache_max_entries": cache_max_entries,
+            "prefix_index": prefix_index,
+            "providers_file": providers_file,
+            "enrich_timeout": enrich_timeout,
+            "enrich_retries": enrich_retries,
+            "profile": profile,
+            "default_region": default_region,
+        }
+        # Region used to read numbers written without a "+"
+        self.default_region = default_region
+        self.metrics = Metrics() if profile else NULL_METRICS
+        self.prefix_cache = PrefixCache(prefix_cache_size)
+        if prefix_index:
+            self.prefix_source = PrefixIndex(prefix_index)
+            if self.prefix_source.version != phonenumbers.__version__:
+                print(f"⚠️  {prefix_index} was built for phonenumbers {self.prefix_source.version}, "
+                      f"running {phonenumbers.__version__}; rebuild it with --build-index", file=sys.stderr)
+        else:
+            self.prefix_source = LibraryPrefixSource()
+        self.result_cache = ResultCache(cache_db, cache_ttl, cache_max_entries) if cache_db else None
+        self._session = None
+        self._enricher = None
+    
+    @property
+    def session(self):
+        """HTTP session for web lookups, created on first use"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            self._session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0'
+            })
+        return self._session
+    
+    @property
+    def enricher(self):
+        """Enricher for the configured providers, created on first use"""
+        if self._enricher is None:
+            self._enricher = Enricher(load_providers(self.options["providers_file"]), self.session,
+                                      self.options["enrich_timeout"], self.options["enrich_retries"])
+        return self._enricher
     
     def print_banner(self):
         """Display tool banner"""
@@ -87,11 +1966,156 @@ class PhoneLookupTool:
     def validate_phone_number(self, phone_number):
         """Validate phone number format"""
         try:
-            parsed = phonenumbers.parse(phone_number, None)
+            parsed = parse_phone_number(phone_number, self.default_region)
             return phonenumbers.is_valid_number(parsed)
         except:
             return False
     
+    def lookup(self, phone_number, advanced=True):
+        """Parse a phone number once and compute every derived field into a LookupResult"""
+        cache = self.result_cache
+        metrics = self.metrics
+        metrics.count("numbers")
+        if cache is not None and E164_PATTERN.match(phone_number):
+            # Canonical E.164 input is its own cache key, so a warm hit skips parsing entirely
+            with metrics.stage("result_cache"):
+                payload = cache.get(phone_number)
+            if payload is not None:
+                return LookupResult.from_cache(phone_number, payload)
+        
+        result = LookupResult(phone_number)
+        with metrics.stage("parse"):
+            try:
+                parsed_number = parse_phone_number(phone_number, self.default_region)
+            except phonenumbers.NumberParseException as e:
+                result.error = str(e)
+                parsed_number = None
+        if parsed_number is None:
+            metrics.count("parse_errors")
+            return result
+        
+        if cache is not None:
+            cache_key = canonical_number(parsed_number)
+            if cache_key != phone_number:
+                with metrics.stage("result_cache"):
+                    payload = cache.get(cache_key)
+                if payload is not None:
+                    return LookupResult.from_cache(phone_number, payload)
+            # Stored once digit analysis has run, see store_result()
+            result.cache_key = cache_key
+        
+        result.parsed = parsed_number
+        result.country_code = parsed_number.country_code
+        result.national_number = parsed_number.national_number
+        result.digits = str(parsed_number.national_number)
+        with metrics.stage("validate"):
+            # Same as is_valid_number(), but keeps the region for the prefix cache key
+            result.region_code = phonenumbers.region_code_for_number(parsed_number)
+            result.valid = phonenumbers.is_valid_number_for_region(parsed_number, result.region_code)
+        if not result.valid:
+            result.error = "Invalid phone number"
+            metrics.count("invalid")
+        else:
+            self.fill_basic(result)
+        
+        if advanced:
+            with metrics.stage("patterns"):
+                self.analyze_digits(result)
+            self.store_result(result)
+        return result
+    
+    def lookup_many(self, numbers):
+        """Look up a chunk of numbers, running digit analysis for the whole chunk at once"""
+        results = [self.lookup(phone_number, advanced=False) for phone_number in numbers]
+        pending = [result for result in results if result.patterns is None and result.digits is not None]
+        with self.metrics.stage("patterns", len(pending)):
+            if len(pending) >= VECTORIZE_MIN_BATCH and load_numpy():
+                analyzed = analyze_digit_batch([result.digits for result in pending])
+                for result, (patterns, risk) in zip(pending, analyzed):
+                    result.patterns = patterns
+                    result.risk = risk
+            else:
+                for result in pending:
+                    self.analyze_digits(result)
+        for result in results:
+            self.store_result(result)
+        return results
+    
+    def store_result(self, result):
+        """Write a fully analyzed result to the result cache if it came from a cache miss"""
+        if result.cache_key is not None:
+            with self.metrics.stage("result_cache"):
+                self.result_cache.put(result.cache_key, result.to_cache())
+            result.cache_key = None
+    
+    def fill_basic(self, result):
+        """Compute formats, type, location, carrier and timezones for a parsed result"""
+        parsed_number = result.parsed
+        metrics = self.metrics
+        with metrics.stage("format"):
+            result.number = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+            result.national_format = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.NATIONAL)
+            result.e164_format = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
+            result.possible = phonenumbers.is_possible_number(parsed_number)
+        with metrics.stage("number_type"):
+            result.number_type = phonenumbers.number_type(parsed_number)
+            result.type = NUMBER_TYPE_LABELS.get(result.number_type, "❓ Unknown")
+        with metrics.stage("prefix_data"):
+            result.location, result.carrier, timezones = self.resolve_prefix_data(result)
+        result.timezones = list(timezones)
+    
+    def resolve_prefix_data(self, result):
+        """Resolve location, carrier and timezones, memoized by the longest matching metadata prefix"""
+        # Argentine mobile numbers are geocoded after stripping the mobile token, so the
+        # matching prefix does not determine the answer; resolve those directly
+        if result.country_code == 54 and result.digits.startswith("9"):
+            key = None
+        else:
+            key = (result.country_code, result.region_code, result.number_type,
+                   self.prefix_source.matching_prefix(result.e164_format))
+            cached = self.prefix_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        resolved = self.prefix_source.resolve(result)
+        if key is not None:
+            self.prefix_cache.put(key, resolved)
+        return resolved
+    
+    def country_name_of(self, result):
+        """Country name for a valid result, computed once through the active prefix source"""
+        if result.country_name is None and result.valid:
+            if result.parsed is None:
+                # Results restored from the result cache carry no parsed object
+                result.parsed = phonenumbers.parse(result.e164_format, None)
+            result.country_name = self.prefix_source.country_name(result.parsed)
+        return result.country_name
+    
+    def analyze_digits(self, result):
+        """Compute pattern and risk analysis for a parsed result, once"""
+        if result.patterns is None and result.digits is not None:
+            result.patterns, result.risk = self.digit_analysis(result.digits)
+        return result
+    
+    def digit_analysis(self, number_str):
+        """Run each digit check once and return detect_patterns() and assess_risk() results together"""
+        return digit_labels(
+            number_str,
+            len(set(number_str)) == 1,
+            self.is_sequential(number_str, ascending=True),
+            self.is_sequential(number_str, ascending=False),
+            number_str == number_str[::-1],
+            self.find_repeated_pattern(number_str),
+            self.has_consecutive_pairs(number_str),
+            len(number_str) < 7,
+        )
+    
+    def _as_result(self, phone_number):
+        """Accept either a raw phone number or an existing LookupResult"""
+        if isinstance(phone_number, LookupResult):
+            return phone_number
+        return self.lookup(phone_number)
+    
     def basic_lookup(self, phone_number, verbose=False):
         """Perform basic phone number analysis"""
         print("\n" + "="*60)
@@ -99,68 +2123,267 @@ class PhoneLookupTool:
         print("="*60)
         
         try:
-            parsed_number = phonenumbers.parse(phone_number, None)
+            result = self._as_result(phone_number)
             
-            if not phonenumbers.is_valid_number(parsed_number):
+            if not result.valid:
                 print("❌ Invalid phone number")
                 return
             
-            # Basic information
-            info = {
-                "number": phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
-                "national_format": phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.NATIONAL),
-                "e164_format": phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164),
-                "valid": phonenumbers.is_valid_number(parsed_number),
-                "possible": phonenumbers.is_possible_number(parsed_number),
-                "location": geocoder.description_for_number(parsed_number, "en") or "Unknown",
-                "carrier": carrier.name_for_number(parsed_number, "en") or "Unknown",
-                "timezones": list(timezone.time_zones_for_number(parsed_number)),
-                "country_code": parsed_number.country_code,
-                "national_number": parsed_number.national_number,
-            }
-            
-            # Number type
-            number_type = phonenumbers.number_type(parsed_number)
-            type_map = {
-                phonenumbers.PhoneNumberType.MOBILE: "📱 Mobile",
-                phonenumbers.PhoneNumberType.FIXED_LINE: "🏠 Fixed Line",
-                phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE: "📞 Fixed Line or Mobile",
-                phonenumbers.PhoneNumberType.VOIP: "💻 VOIP",
-                phonenumbers.PhoneNumberType.TOLL_FREE: "🆓 Toll Free",
-                phonenumbers.PhoneNumberType.PREMIUM_RATE: "💰 Premium Rate",
-                phonenumbers.PhoneNumberType.SHARED_COST: "👥 Shared Cost",
-                phonenumbers.PhoneNumberType.PERSONAL_NUMBER: "👤 Personal Number",
-                phonenumbers.PhoneNumberType.PAGER: "📟 Pager",
-                phonenumbers.PhoneNumberType.UAN: "🏢 UAN",
-                phonenumbers.PhoneNumberType.VOICEMAIL: "📭 Voicemail",
-            }
-            info["type"] = type_map.get(number_type, "❓ Unknown")
-            
-            # Print results
-            print(f"\n📊 Basic Information:")
-            print(f"  International: {info['number']}")
-            print(f"  National:      {info['national_format']}")
-            print(f"  E164:          {info['e164_format']}")
-            print(f"  Valid:         {'✅ Yes' if info['valid'] else '❌ No'}")
-            print(f"  Possible:      {'✅ Yes' if info['possible'] else '❌ No'}")
-            print(f"  Type:          {info['type']}")
-            print(f"  Location:      {info['location']}")
-            print(f"  Carrier:       {info['carrier']}")
-            print(f"  Country Code:  +{info['country_code']}")
-            print(f"  National No:   {info['national_number']}")
-            print(f"  Timezones:     {', '.join(info['timezones']) if info['timezones'] else 'Unknown'}")
-            
-            if verbose:
-                print(f"\n🔍 Verbose Information:")
-                print(f"  Raw Type:      {number_type}")
-                print(f"  Country Source: {geocoder.country_name_for_number(parsed_number, 'en')}")
-                
-            return info
+            print(self.render_basic(result, verbose))
+            return result.info()
             
         except Exception as e:
             print(f"❌ Error in basic lookup: {e}")
             return None
     
+    def render_basic(self, result, verbose=False):
+        """Render the basic information section for a valid result"""
+        info = result.info()
+        lines = [
+            f"\n📊 Basic Information:",
+            f"  International: {info['number']}",
+            f"  National:      {info['national_format']}",
+            f"  E164:          {info['e164_format']}",
+            f"  Valid:         {'✅ Yes' if info['valid'] else '❌ No'}",
+            f"  Possible:      {'✅ Yes' if info['possible'] else '❌ No'}",
+            f"  Type:          {info['type']}",
+            f"  Location:      {info['location']}",
+            f"  Carrier:       {info['carrier']}",
+            f"  Country Code:  +{info['country_code']}",
+            f"  National No:   {info['national_number']}",
+            f"  Timezones:     {', '.join(info['timezones']) if info['timezones'] else 'Unknown'}",
+        ]
+        
+        if verbose:
+            lines.append(f"\n🔍 Verbose Information:")
+            lines.append(f"  Raw Type:      {result.number_type}")
+            lines.append(f"  Country Source: {self.country_name_of(result)}")
+        return "\n".join(lines)
+    
+    def validate_record(self, phone_number):
+        """Check validity only, touching nothing but the core parsing metadata"""
+        record = {"input": phone_number, "valid": False}
+        metrics = self.metrics
+        metrics.count("numbers")
+        with metrics.stage("parse"):
+            try:
+                parsed_number = parse_phone_number(phone_number, self.default_region)
+            except phonenumbers.NumberParseException as e:
+                record["error"] = str(e)
+                parsed_number = None
+        if parsed_number is None:
+            metrics.count("parse_errors")
+            return record
+        with metrics.stage("validate"):
+            valid = phonenumbers.is_valid_number(parsed_number)
+        if valid:
+            record["valid"] = True
+            record["e164_format"] = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
+        else:
+            record["error"] = "Invalid phone number"
+            metrics.count("invalid")
+        return record
+    
+    def analyze_chunk(self, numbers, validate_only=False):
+        """Return one record per number in a chunk"""
+        if validate_only:
+            return [self.validate_record(phone_number) for phone_number in numbers]
+        return [result.to_record() for result in self.lookup_many(numbers)]
+    
+    def iter_records(self, numbers, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False):
+        """Lazily analyze an iterable of phone numbers, yielding one record per number"""
+        for chunk in iter_chunks(numbers, chunk_size):
+            yield from self.analyze_chunk(chunk, validate_only)
+    
+    def iter_enriched(self, records, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Attach provider answers to valid records, enriching a chunk of numbers concurrently"""
+        for chunk in iter_chunks(records, chunk_size):
+            valid = [record for record in chunk if record.get("valid")]
+            with self.metrics.stage("enrich", len(valid)):
+                answers = self.enricher.enrich_batch([record["e164_format"] for record in valid])
+            for record, enrichment in zip(valid, answers):
+                record["enrichment"] = enrichment
+            yield from chunk
+    
+    def close(self):
+        """Release persistent resources such as the result cache"""
+        if self._enricher is not None:
+            self._enricher.close()
+        if self.result_cache is not None:
+            self.result_cache.close()
+        if isinstance(self.prefix_source, PrefixIndex):
+            self.prefix_source.close()
+    
+    def iter_parallel_records(self, numbers, workers, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False):
+        """Analyze numbers across a process pool, yielding records in input order"""
+        tasks = ((_process_chunk, chunk, validate_only) for chunk in iter_chunks(numbers, chunk_size))
+        return self._iter_pool_records(tasks, workers)
+    
+    def iter_mapped_records(self, mapped, workers, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False,
+                            normalizer=None, start=0, end=None, executor=None):
+        """Analyze a MappedInput across a process pool, yielding records in input order
+        
+        Workers receive byte ranges of about chunk_size lines and read the file
+        themselves, so numbers are never parsed or pickled by this process.
+        With a normalizer, workers normalize and duplicates are dropped here.
+        start and end limit the run to a newline-aligned part of the file.
+        """
+        tasks = ((_process_range, mapped.path, range_start, range_end, validate_only, normalizer is not None)
+                 for range_start, range_end in mapped.split(mapped.range_bytes(chunk_size), start, end))
+        records = self._iter_pool_records(tasks, workers, normalizer, executor)
+        if normalizer is not None and normalizer.deduplicator is not None:
+            records = normalizer.iter_unique_records(records)
+        return records
+    
+    def iter_block_records(self, block, workers, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False, executor=None):
+        """Analyze a NumberBlock across a process pool, yielding records in block order
+        
+        Workers receive slice positions and generate the numbers themselves.
+        """
+        tasks = ((_process_block, block, start, stop, validate_only) for start, stop in block.split(chunk_size))
+        return self._iter_pool_records(tasks, workers, executor=executor)
+    
+    def process_pool(self, workers):
+        """Create a process pool whose workers each hold their own PhoneLookupTool"""
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.options,))
+    
+    def _iter_pool_records(self, tasks, workers, normalizer=None, executor=None):
+        """Run (function, *args) tasks on a process pool, yielding their records in task order
+        
+        A pool is started for the run unless an executor from process_pool() is given.
+        """
+        if executor is None:
+            with self.process_pool(workers) as executor:
+                yield from self._iter_pool_records(tasks, workers, normalizer, executor)
+            return
+        # Keep a bounded window of chunks in flight so huge inputs are never fully buffered
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(*task))
+            if len(pending) >= workers * 2:
+                yield from self._collect_chunk(pending.popleft(), normalizer)
+        while pending:
+            yield from self._collect_chunk(pending.popleft(), normalizer)
+    
+    def _collect_chunk(self, future, normalizer=None):
+        """Unpack a worker chunk result, folding its cache counters into ours"""
+        with self.metrics.stage("worker_wait"):
+            records, counters = future.result()
+        normalizer_counters = counters.pop("normalizer", None)
+        if normalizer is not None and normalizer_counters:
+            normalizer.merge_counters(normalizer_counters)
+        self.merge_counters(counters)
+        return records
+    
+    def pop_counters(self):
+        """Return cache counters since the last call and reset them"""
+        return {
+            "prefix_cache": self.prefix_cache.pop_counters(),
+            "result_cache": self.result_cache.pop_counters() if self.result_cache else None,
+            "metrics": self.metrics.pop(),
+        }
+    
+    def merge_counters(self, counters):
+        """Fold counters returned by pop_counters() in another process into ours"""
+        self.prefix_cache.merge_counters(counters["prefix_cache"])
+        if self.result_cache is not None and counters["result_cache"]:
+            self.result_cache.merge_counters(counters["result_cache"])
+        self.metrics.merge(counters["metrics"])
+    
+    def metrics_summary(self):
+        """Return --profile stage timings and counters together with cache and HTTP statistics"""
+        summary = self.metrics.summary()
+        if self._enricher is not None:
+            summary["counters"]["http_calls"] = self._enricher.http_calls
+            summary["counters"] = dict(sorted(summary["counters"].items()))
+        summary["caches"] = self.cache_stats()
+        return summary
+    
+    def cache_stats(self):
+        """Return statistics for every enabled cache"""
+        stats = {"prefix_cache": self.prefix_cache.stats()}
+        if self.result_cache is not None:
+            stats["result_cache"] = self.result_cache.stats()
+        return stats
+    
+    def iter_batch_records(self, numbers, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False,
+                           enrich=False, normalizer=None, start=0, end=None, executor=None):
+        """Build the record stream of run_batch(), for bytes [start, end) if numbers is a MappedInput"""
+        if workers > 1 and isinstance(numbers, MappedInput):
+            records = self.iter_mapped_records(numbers, workers, chunk_size, validate_only, normalizer,
+                                               start, end, executor)
+        elif workers > 1 and isinstance(numbers, NumberBlock) and normalizer is None:
+            records = self.iter_block_records(numbers, workers, chunk_size, validate_only, executor)
+        else:
+            if isinstance(numbers, MappedInput):
+                numbers = numbers.iter_range(start, end)
+            if normalizer is not None:
+                numbers = normalizer.iter(numbers)
+            if workers > 1:
+                records = self.iter_parallel_records(numbers, workers, chunk_size, validate_only)
+            else:
+                records = self.iter_records(numbers, chunk_size, validate_only)
+        if enrich:
+            records = self.iter_enriched(records, chunk_size)
+        return records
+    
+    def run_batch(self, numbers, output, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, validate_only=False,
+                  enrich=False, output_format="ndjson", sinks=(), normalizer=None, checkpoint=None):
+        """Stream records for many numbers to output in the given format
+        
+        numbers is any iterable of raw numbers; a MappedInput is split into byte
+        ranges and a NumberBlock into slices that pool workers read directly. An InputNormalizer, if given,
+        normalizes and de-duplicates the numbers first. Every record is also
+        passed to each sink's write(), e.g. a ColumnarStore or AggregateReport.
+        With output=None records only go to the sinks.
+        
+        With a Checkpoint (MappedInput only) the run starts at its offset and
+        goes segment by segment, saving progress between segments when due.
+        """
+        writers = list(sinks)
+        if output is not None:
+            writers.insert(0, OUTPUT_FORMATS[output_format](output, checkpoint.records if checkpoint else 0))
+        if len(writers) == 1:
+            write = writers[0].write
+        else:
+            def write(record):
+                for writer in writers:
+                    writer.write(record)
+        
+        metrics = self.metrics
+        if checkpoint is None:
+            pool = nullcontext()
+        else:
+            # One pool serves every segment, so workers load their metadata once
+            pool = self.process_pool(workers) if workers > 1 else nullcontext()
+            segment_bytes = numbers.range_bytes(chunk_size * workers * CHECKPOINT_SEGMENT_CHUNKS)
+        with pool as executor:
+            if checkpoint is None:
+                segments = [(self.iter_batch_records(numbers, workers, chunk_size, validate_only, enrich,
+                                                     normalizer), None)]
+            else:
+                segments = ((self.iter_batch_records(numbers, workers, chunk_size, validate_only, enrich,
+                                                     normalizer, start, end, executor), end)
+                            for start, end in numbers.split(segment_bytes, checkpoint.offset))
+            for records, end in segments:
+                if metrics:
+                    for record in records:
+                        with metrics.stage("output"):
+                            write(record)
+                else:
+                    for record in records:
+                        write(record)
+                # The segment is fully drained, so everything before end is in the writers
+                if end is not None and checkpoint.due():
+                    with metrics.stage("checkpoint", 0):
+                        checkpoint.save(end, output, writers[0].count)
+        # items=0 adds the final flush to the stage total without counting a record
+        with metrics.stage("output", 0):
+            for writer in writers:
+                writer.close()
+        return writers[0].count
+    
     def advanced_analysis(self, phone_number):
         """Perform advanced number analysis"""
         print("\n" + "="*60)
@@ -168,51 +2391,55 @@ class PhoneLookupTool:
         print("="*60)
         
         try:
-            parsed_number = phonenumbers.parse(phone_number, None)
-            national_number = str(parsed_number.national_number)
-            
-            print(f"\n📈 Number Pattern Analysis:")
-            print(f"  Total digits: {len(national_number)}")
-            
-            # Pattern detection
-            patterns = self.detect_patterns(national_number)
-            if patterns:
-                print("  🎭 Detected Patterns:")
-                for pattern in patterns:
-                    print(f"    • {pattern}")
-            
-            # Risk assessment
-            risk = self.assess_risk(national_number)
-            print(f"  🎯 Risk Level: {risk['level']} - {risk['reason']}")
-            
-            # Number characteristics
-            print(f"\n🔢 Number Characteristics:")
-            print(f"  Even digits: {sum(1 for d in national_number if int(d) % 2 == 0)}")
-            print(f"  Odd digits: {sum(1 for d in national_number if int(d) % 2 == 1)}")
-            print(f"  Unique digits: {len(set(national_number))}")
-            
-            # Country-specific info
-            country = geocoder.country_name_for_number(parsed_number, "en")
-            if country:
-                print(f"\n🌍 Country Information:")
-                print(f"  Country: {country}")
-                
-                # Typical number length by country
-                typical_lengths = {
-                    "US": 10, "GB": 10, "CA": 10, "AU": 9, "DE": 10, 
-                    "FR": 9, "IT": 10, "ES": 9, "BR": 11, "IN": 10
-                }
-                
-                for code, length in typical_lengths.items():
-                    if country.lower().find(code.lower()) != -1:
-                        actual_length = len(national_number)
-                        status = "✅ Normal" if actual_length == length else "⚠️  Atypical"
-                        print(f"  Typical length: {length} digits ({status})")
-                        break
+            result = self.analyze_digits(self._as_result(phone_number))
+            if result.digits is None:
+                raise ValueError(result.error)
+            print(self.render_advanced(result))
             
         except Exception as e:
             print(f"❌ Error in advanced analysis: {e}")
     
+    def render_advanced(self, result):
+        """Render the pattern, risk and country sections for an analyzed result"""
+        national_number = result.digits
+        lines = [
+            f"\n📈 Number Pattern Analysis:",
+            f"  Total digits: {len(national_number)}",
+        ]
+        
+        # Pattern detection
+        patterns = result.patterns
+        if patterns:
+            lines.append("  🎭 Detected Patterns:")
+            for pattern in patterns:
+                lines.append(f"    • {pattern}")
+        
+        # Risk assessment
+        risk = result.risk
+        lines.append(f"  🎯 Risk Level: {risk['level']} - {risk['reason']}")
+        
+        # Number characteristics
+        even_digits = sum(1 for d in national_number if d in "02468")
+        lines.append(f"\n🔢 Number Characteristics:")
+        lines.append(f"  Even digits: {even_digits}")
+        lines.append(f"  Odd digits: {len(national_number) - even_digits}")
+        lines.append(f"  Unique digits: {len(set(national_number))}")
+        
+        # Country-specific info
+        country = self.country_name_of(result)
+        if country:
+            lines.append(f"\n🌍 Country Information:")
+            lines.append(f"  Country: {country}")
+            
+            # Typical number length by country
+            for code, length in TYPICAL_LENGTHS.items():
+                if country.lower().find(code.lower()) != -1:
+                    actual_length = len(national_number)
+                    status = "✅ Normal" if actual_length == length else "⚠️  Atypical"
+                    lines.append(f"  Typical length: {length} digits ({status})")
+                    break
+        return "\n".join(lines)
+    
     def detect_patterns(self, number_str):
         """Detect interesting number patterns"""
         patterns = []
@@ -336,50 +2563,60 @@ class PhoneLookupTool:
     
     def check_free_apis(self, phone_number):
         """Check free phone number APIs"""
-        apis = [
-            {
-                "name": "NumVerify",
-                "url": f"http://apilayer.net/api/validate?access_key=YOUR_KEY&number={phone_number}",
-                "note": "Requires free API key"
-            },
-            {
-                "name": "AbstractAPI",
-                "url": f"https://phonevalidation.abstractapi.com/v1/?api_key=YOUR_KEY&phone={phone_number}",
-                "note": "Requires free API key"
-            }
-        ]
+        enricher = self.enricher
+        configured = {provider["name"] for provider in enricher.providers}
+        for provider in load_providers(self.options["providers_file"]):
+            if provider["name"] not in configured:
+                key_env = provider.get("key_env")
+                hint = f" (set {key_env})" if key_env else ""
+                print(f"  • {provider['name']}: Requires free API key{hint}")
+        if not configured:
+            return
         
-        for api in apis:
-            print(f"  • {api['name']}: {api['note']}")
+        parsed = parse_phone_number(phone_number, self.default_region)
+        e164 = phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+        answers = enricher.enrich_batch([e164])[0]
+        for name, answer in answers.items():
+            if answer["status"] == "ok":
+                print(f"  • {name}: {json.dumps(answer['data'], ensure_ascii=False)}")
+            else:
+                print(f"  • {name}: ❌ {answer['error']}")
     
     def format_output(self, phone_number, info, advanced_data=None):
         """Format final output"""
         print("\n" + "="*60)
         print("📋 SUMMARY REPORT")
         print("="*60)
-        
-        print(f"\n📱 Target: {phone_number}")
-        print(f"📅 Generated: {self.get_timestamp()}")
-        
+        print(self.render_summary(phone_number, info))
+    
+    def render_summary(self, phone_number, info):
+        """Render the summary report body"""
+        lines = [
+            f"\n📱 Target: {phone_number}",
+            f"📅 Generated: {self.get_timestamp()}",
+        ]
         if info:
-            print(f"\n✅ Valid: Yes")
-            print(f"🌍 Location: {info.get('location', 'Unknown')}")
-            print(f"📞 Carrier: {info.get('carrier', 'Unknown')}")
-            print(f"🎯 Type: {info.get('type', 'Unknown')}")
+            lines.append(f"\n✅ Valid: Yes")
+            lines.append(f"🌍 Location: {info.get('location', 'Unknown')}")
+            lines.append(f"📞 Carrier: {info.get('carrier', 'Unknown')}")
+            lines.append(f"🎯 Type: {info.get('type', 'Unknown')}")
         else:
-            print(f"\n❌ Valid: No")
+            lines.append(f"\n❌ Valid: No")
+        return "\n".join(lines)
     
     def get_timestamp(self):
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     def run_comprehensive_analysis(self, phone_number, verbose=False, web_search_flag=False):
         """Run complete analysis"""
         self.print_banner()
         
+        # Parse and analyze once; every stage below renders from this result
+        result = self.lookup(phone_number)
+        
         # Validate input
-        if not self.validate_phone_number(phone_number):
+        if not result.valid:
             print("❌ Invalid phone number format. Use international format: +1234567890")
             print("   Example: +14155552671 (US) or +442079460000 (UK)")
             return
@@ -387,18 +2624,24 @@ class PhoneLookupTool:
         print(f"🎯 Analyzing: {phone_number}")
         
         try:
+            metrics = self.metrics
+            
             # Basic lookup
-            info = self.basic_lookup(phone_number, verbose)
+            with metrics.stage("render_basic"):
+                info = self.basic_lookup(result, verbose)
             
             # Advanced analysis
-            self.advanced_analysis(phone_number)
+            with metrics.stage("render_advanced"):
+                self.advanced_analysis(result)
             
             # Web search (if requested)
             if web_search_flag:
-                self.web_search(phone_number)
+                with metrics.stage("web"):
+                    self.web_search(phone_number)
             
             # Final summary
-            self.format_output(phone_number, info)
+            with metrics.stage("render_summary"):
+                self.format_output(phone_number, info)
             
             print(f"\n{'='*60}")
             print("✅ Analysis complete!")
@@ -410,6 +2653,272 @@ class PhoneLookupTool:
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}")
 
+class LookupService:
+    """Shares one warm PhoneLookupTool between the request threads of serve mode
+    
+    Lookups are CPU bound and the tool's caches are not thread-safe, so tool
+    access is serialized by a lock while threads overlap network I/O. Batches
+    release the lock between chunks so single lookups are not starved, and a
+    bounded number of requests may wait for the lock before new ones are
+    turned away.
+    """
+    
+    def __init__(self, tool, max_pending=DEFAULT_SERVE_MAX_PENDING, max_batch=DEFAULT_SERVE_MAX_BATCH):
+        import threading
+        self.tool = tool
+        self.max_batch = max_batch
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.requests = 0
+        self.rejected = 0
+    
+    def admit(self):
+        """Reserve a request slot without blocking; False means the service is saturated"""
+        if self.slots.acquire(blocking=False):
+            return True
+        self.rejected += 1
+        return False
+    
+    def release(self, elapsed_ns):
+        """Free a slot reserved by admit() and record how long the request took"""
+        # Metrics are shared with the lookups, so they are only touched under the lock
+        with self.lock:
+            self.requests += 1
+            self.tool.metrics.observe("request", elapsed_ns)
+        self.slots.release()
+    
+    def lookup(self, phone_number, validate_only=False):
+        """Return the record for one number"""
+        with self.lock:
+            return self.tool.analyze_chunk([phone_number], validate_only)[0]
+    
+    def lookup_batch(self, numbers, validate_only=False):
+        """Return records for a list of numbers, in order"""
+        records = []
+        for chunk in iter_chunks(numbers, DEFAULT_CHUNK_SIZE):
+            with self.lock:
+                records.extend(self.tool.analyze_chunk(chunk, validate_only))
+        return records
+    
+    def stats(self):
+        """Return service counters together with the tool's metrics and cache statistics"""
+        with self.lock:
+            summary = self.tool.metrics_summary()
+        summary["service"] = {"requests": self.requests, "rejected": self.rejected}
+        return summary
+
+def parse_serve_address(address):
+    """Split a --serve address into ("unix", path) or ("tcp", (host, port))"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"expected HOST:PORT or unix:PATH, got {address!r}")
+    return "tcp", (host.strip("[]") or "127.0.0.1", int(port))
+
+def run_server(service, address, verbose=False):
+    """Serve lookups over HTTP on a TCP or Unix socket until interrupted
+    
+    GET  /lookup?number=+14155552671[&validate_only=1]   one record
+    POST /batch  {"numbers": [...]} or [...]              list of records
+    GET  /health                                          liveness check
+    GET  /metrics                                         counters and cache statistics
+    """
+    import signal
+    import socket
+    import socketserver
+    import stat
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+    
+    class LookupRequestHandler(BaseHTTPRequestHandler):
+        # Keep-alive connections spare clients a TCP handshake per lookup; a buffered
+        # writer sends headers and body together instead of tripping Nagle's algorithm
+        protocol_version = "HTTP/1.1"
+        wbufsize = -1
+        server_version = "PhoneLookup/1.0"
+        
+        def send_json(self, status, payload, headers=()):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if self.close_connection:
+                self.send_header("Connection", "close")
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def send_error_json(self, status, message, headers=()):
+            self.send_json(status, {"error": message}, headers)
+        
+        def handle_admitted(self, handler):
+            if not service.admit():
+                self.send_error_json(503, "too many pending requests", [("Retry-After", "1")])
+                return
+            started = time.perf_counter_ns()
+            try:
+                handler()
+            finally:
+                service.release(time.perf_counter_ns() - started)
+        
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self.send_json(200, {"status": "ok", "phonenumbers_version": phonenumbers.__version__})
+            elif url.path == "/metrics":
+                self.send_json(200, service.stats())
+            elif url.path == "/lookup":
+                # A literal "+" is the international prefix here, not an encoded space
+                query = parse_qs(url.query.replace("+", "%2B"))
+                numbers = query.get("number")
+                if not numbers:
+                    self.send_error_json(400, "missing number parameter")
+                    return
+                validate_only = query.get("validate_only", ["0"])[0] in ("1", "true")
+                self.handle_admitted(lambda: self.send_json(200, service.lookup(numbers[0], validate_only)))
+            else:
+                self.send_error_json(404, f"unknown endpoint {url.path}")
+        
+        def do_POST(self):
+            url = urlsplit(self.path)
+            # Replies sent before the body is read must close the connection, or the
+            # unread body would be parsed as the next request on it
+            if url.path != "/batch":
+                self.close_connection = True
+                self.send_error_json(404, f"unknown endpoint {url.path}")
+                return
+            length = self.headers.get("Content-Length")
+            if length is None or not length.isdigit():
+                self.close_connection = True
+                self.send_error_json(411, "Content-Length required")
+                return
+            if int(length) > SERVE_MAX_BODY:
+                self.close_connection = True
+                self.send_error_json(413, f"request body larger than {SERVE_MAX_BODY} bytes")
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(length)) or b"null")
+            except ValueError as e:
+                self.send_error_json(400, f"invalid JSON: {e}")
+                return
+            options = payload if isinstance(payload, dict) else {"numbers": payload}
+            numbers = options.get("numbers")
+            if not isinstance(numbers, list) or not all(isinstance(number, str) for number in numbers):
+                self.send_error_json(400, "expected a list of phone number strings")
+                return
+            if len(numbers) > service.max_batch:
+                self.send_error_json(413, f"batch larger than {service.max_batch} numbers")
+                return
+            validate_only = bool(options.get("validate_only"))
+            self.handle_admitted(lambda: self.send_json(200, service.lookup_batch(numbers, validate_only)))
+        
+        def address_string(self):
+            # Unix socket peers have no address
+            return self.client_address[0] if self.client_address else "unix"
+        
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+    
+    family, bind_address = parse_serve_address(address)
+    if family == "unix":
+        class UnixLookupServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+        
+        # Remove a socket left behind by a previous run, but never a regular file
+        if os.path.exists(bind_address) and stat.S_ISSOCK(os.stat(bind_address).st_mode):
+            os.unlink(bind_address)
+        server = UnixLookupServer(bind_address, LookupRequestHandler)
+    else:
+        class TcpLookupServer(ThreadingHTTPServer):
+            address_family = socket.AF_INET6 if ":" in bind_address[0] else socket.AF_INET
+            request_queue_size = 128
+        
+        server = TcpLookupServer(bind_address, LookupRequestHandler)
+    
+    # Load the prefix tables and NumPy before the first request, not during it
+    service.tool.lookup("+14155552671", advanced=False)
+    load_numpy()
+    service.tool.pop_counters()
+    
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    
+    # Service managers stop with SIGTERM; treat it like Ctrl+C so caches are flushed
+    previous_handler = signal.signal(signal.SIGTERM, stop)
+    print(f"🚀 Serving lookups on {address} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️  Shutting down", file=sys.stderr)
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.server_close()
+        if family == "unix" and os.path.exists(bind_address):
+            os.unlink(bind_address)
+
+def run_index_verification(index_path, input_path=None):
+    """Verify an index file and report the result, returning a process exit code"""
+    numbers = index_verification_numbers()
+    source = None
+    if input_path:
+        source = open_input(input_path)
+        numbers = chain(numbers, iter_input_numbers(source))
+    index = PrefixIndex(index_path)
+    try:
+        checked, mismatches = verify_prefix_index(index, numbers)
+    finally:
+        index.close()
+        if source is not None:
+            source.close()
+    
+    for phone_number, expected, actual in mismatches[:20]:
+        print(f"❌ {phone_number}: library {expected} != index {actual}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} of {checked} numbers differ from the phonenumbers library")
+        return 1
+    print(f"✅ {checked} numbers match the phonenumbers library exactly")
+    return 0
+
+def print_startup_time(ready_at):
+    """Report module import, setup and total run time to stderr"""
+    def elapsed(moment):
+        return (moment - _IMPORT_STARTED) * 1000
+    print(f"⏱️  Startup: imports {elapsed(_IMPORTS_DONE):.1f} ms, ready {elapsed(ready_at):.1f} ms, "
+          f"total {elapsed(time.perf_counter()):.1f} ms", file=sys.stderr)
+
+def write_metrics(tool, show_summary, path=None):
+    """Print the --profile summary to stderr and/or dump it as JSON"""
+    summary = tool.metrics_summary()
+    if show_summary:
+        print("\n⏱️  Profile:", file=sys.stderr)
+        print(tool.metrics.render(summary), file=sys.stderr)
+        for name, stats in summary["caches"].items():
+            print(f"{name}: {json.dumps(stats)}", file=sys.stderr)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+
+def checkpoint_signature(args):
+    """Describe a batch job so a checkpoint is only resumed by the same job on the same input"""
+    stat = os.stat(args.input)
+    return {
+        "input": os.path.abspath(args.input),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime_ns,
+        "output": os.path.abspath(args.output) if args.output else None,
+        "format": args.format,
+        "validate_only": args.validate_only,
+        "enrich": args.enrich,
+        "default_region": args.default_region,
+        "dedup": args.dedup,
+        "store": args.store,
+        "report": args.report,
+    }
+
 def main():
     """Main command line interface"""
     parser = argparse.ArgumentParser(
@@ -421,6 +2930,24 @@ Examples:
   python3 phone_lookup.py +442079460000 --verbose
   python3 phone_lookup.py +33145006000 --web
   python3 phone_lookup.py +1234567890 --all
+  python3 phone_lookup.py --input numbers.txt > results.jsonl
+  python3 phone_lookup.py --input numbers.txt --format csv --output results.csv
+  python3 phone_lookup.py +14155552671 --format json
+  cat numbers.txt | python3 phone_lookup.py --input -
+  python3 phone_lookup.py --input numbers.txt --workers 0 > results.jsonl
+  python3 phone_lookup.py +14155552671 --validate-only
+  python3 phone_lookup.py "(415) 555-2671" --default-region US
+  python3 phone_lookup.py --input numbers.txt --default-region US --dedup exact > results.jsonl
+  python3 phone_lookup.py --input numbers.txt --enrich --providers providers.json
+  python3 phone_lookup.py --input numbers.txt --report
+  python3 phone_lookup.py --range +1415555XXXX --report
+  python3 phone_lookup.py --range +14155550000-+14155551999 --format csv --output block.csv
+  python3 phone_lookup.py --input numbers.txt --store results.parquet
+  python3 phone_lookup.py --input numbers.txt --output results.jsonl --checkpoint run.ckpt --resume
+  python3 phone_lookup.py --build-index prefixes.idx
+  python3 phone_lookup.py --serve 127.0.0.1:8080 --cache-db results.db
+  python3 phone_lookup.py --input numbers.txt --prefix-index prefixes.idx
+  python3 phone_lookup.py --input numbers.txt --profile --metrics-file metrics.json > results.jsonl
 
 Legal Notice:
   This tool is for educational and authorized testing purposes only.
@@ -428,30 +2955,255 @@ Legal Notice:
         """
     )
     
-    parser.add_argument('phone_number', help='Phone number in international format (e.g., +1234567890)')
+    parser.add_argument('phone_number', nargs='?', help='Phone number in international format (e.g., +1234567890)')
+    parser.add_argument('-i', '--input', metavar='FILE', help='Batch mode: read numbers one per line from FILE ("-" for stdin) and write one JSON record per line')
+    parser.add_argument('-r', '--range', metavar='BLOCK', help='Batch mode: analyze every number in a block given as a prefix with trailing X wildcards (+1415555XXXX) or START-END')
+    parser.add_argument('-j', '--workers', type=int, default=1, metavar='N', help='Batch mode: analyze with N worker processes (0 = one per CPU core)')
+    parser.add_argument('--prefix-cache-size', type=int, default=DEFAULT_PREFIX_CACHE_SIZE, metavar='N', help=f'Entries in the geocoder/carrier/timezone prefix cache, 0 to disable (default: {DEFAULT_PREFIX_CACHE_SIZE})')
+    parser.add_argument('--cache-stats', action='store_true', help='Batch mode: print cache statistics to stderr when done')
+    parser.add_argument('--cache-db', metavar='PATH', help='Persist analysis results in a SQLite cache shared across runs')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_RESULT_CACHE_TTL, metavar='SECONDS', help=f'Result cache entry lifetime (default: {DEFAULT_RESULT_CACHE_TTL})')
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_RESULT_CACHE_MAX_ENTRIES, metavar='N', help=f'Result cache size limit enforced after each run (default: {DEFAULT_RESULT_CACHE_MAX_ENTRIES})')
+    parser.add_argument('--prefix-index', metavar='PATH', help='Resolve location, carrier and timezones from a compiled prefix index')
+    parser.add_argument('--build-index', metavar='PATH', help='Compile the phonenumbers prefix tables into an index file and exit')
+    parser.add_argument('--verify-index', metavar='PATH', help='Check an index file against the phonenumbers library (plus --input numbers, if given) and exit')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, metavar='N', help=f'Batch mode: numbers sent to a worker at a time (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('-f', '--format', choices=sorted(OUTPUT_FORMATS), help='Write structured records in this format (default for --input: ndjson; a single number prints the full report unless set)')
+    parser.add_argument('-o', '--output', metavar='FILE', help='Write structured records to FILE instead of stdout')
+    parser.add_argument('--store', metavar='PATH', help='Batch mode: keep results in a compact columnar store and export it to PATH (.npz, or .parquet/.arrow/.feather with pyarrow)')
+    parser.add_argument('--report', action='store_true', help='Batch mode: write counts by country, carrier, number type and risk level instead of records (text, or JSON with --format json)')
+    parser.add_argument('--report-top', type=int, default=20, metavar='N', help='Entries per --report section, 0 for all (default: 20)')
+    parser.add_argument('--checkpoint', metavar='FILE', help='Batch mode: periodically save progress to FILE so an interrupted run can be resumed (needs a regular --input file and --output)')
+    parser.add_argument('--resume', action='store_true', help='Continue the run recorded in --checkpoint, if any, instead of starting over')
+    parser.add_argument('--checkpoint-interval', type=float, default=DEFAULT_CHECKPOINT_INTERVAL, metavar='SECONDS', help=f'Minimum time between checkpoints (default: {DEFAULT_CHECKPOINT_INTERVAL})')
+    parser.add_argument('--enrich', action='store_true', help='Batch mode: query the configured validation APIs concurrently and add their answers to each record')
+    parser.add_argument('--providers', metavar='FILE', help='JSON list of enrichment providers (name, url, key or key_env, concurrency, rate, burst, timeout, retries)')
+    parser.add_argument('--enrich-timeout', type=float, default=DEFAULT_ENRICH_TIMEOUT, metavar='SECONDS', help=f'Per-request timeout for enrichment (default: {DEFAULT_ENRICH_TIMEOUT})')
+    parser.add_argument('--enrich-retries', type=int, default=DEFAULT_ENRICH_RETRIES, metavar='N', help=f'Retries for failed or rate-limited enrichment requests (default: {DEFAULT_ENRICH_RETRIES})')
+    parser.add_argument('--default-region', metavar='CC', help='Read numbers without a "+" as national numbers of this region (e.g. US, GB)')
+    parser.add_argument('--dedup', choices=sorted(DEDUPLICATORS), help='Batch mode: normalize input to E.164 and analyze each distinct number once (bloom: fixed memory, may drop a few unique numbers)')
+    parser.add_argument('--dedup-capacity', type=int, default=DEFAULT_DEDUP_CAPACITY, metavar='N', help=f'Distinct numbers the bloom filter is sized for (default: {DEFAULT_DEDUP_CAPACITY})')
+    parser.add_argument('--dedup-error-rate', type=float, default=DEFAULT_DEDUP_ERROR_RATE, metavar='P', help=f'Bloom filter false positive rate at capacity (default: {DEFAULT_DEDUP_ERROR_RATE})')
+    parser.add_argument('--serve', metavar='ADDRESS', help='Keep the tool warm and answer lookups over HTTP on HOST:PORT or unix:PATH')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_SERVE_MAX_PENDING, metavar='N', help=f'Serve mode: requests allowed to wait before new ones get 503 (default: {DEFAULT_SERVE_MAX_PENDING})')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_SERVE_MAX_BATCH, metavar='N', help=f'Serve mode: largest accepted /batch request (default: {DEFAULT_SERVE_MAX_BATCH})')
+    parser.add_argument('--validate-only', action='store_true', help='Only check validity (exit status 1 if invalid); skips geocoder, carrier and timezone data')
+    parser.add_argument('--startup-time', action='store_true', help='Print import, setup and total run time to stderr')
+    parser.add_argument('--profile', action='store_true', help='Time each analysis stage and print a summary with counters to stderr')
+    parser.add_argument('--metrics-file', metavar='FILE', help='Write the --profile stage timings, counters and cache statistics to FILE as JSON (implies --profile)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
     parser.add_argument('-w', '--web', action='store_true', help='Enable web search suggestions')
     parser.add_argument('-a', '--all', action='store_true', help='Run all analysis types')
     
     args = parser.parse_args()
     
-    tool = PhoneLookupTool()
+    if args.build_index:
+        counts = build_prefix_index(args.build_index)
+        print(f"✅ Wrote {args.build_index}: " + ", ".join(f"{count} {table} prefixes" for table, count in counts.items()))
+        return
+    if args.verify_index:
+        sys.exit(run_index_verification(args.verify_index, args.input))
+    
+    if not args.input and not args.range and not args.phone_number and not args.serve:
+        parser.error('a phone number, --input, --range or --serve is required')
+    if args.range:
+        if args.input:
+            parser.error('--range and --input cannot be combined')
+        try:
+            block = NumberBlock(args.range)
+        except ValueError as e:
+            parser.error(f"--range: {e}")
+    if args.serve:
+        try:
+            parse_serve_address(args.serve)
+        except ValueError as e:
+            parser.error(f"--serve: {e}")
+        if args.max_pending < 1 or args.max_batch < 1:
+            parser.error('--max-pending and --max-batch must be positive numbers')
+    if args.workers < 0:
+        parser.error('--workers must be 0 or a positive number')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be a positive number')
+    workers = args.workers or os.cpu_count() or 1
+    if args.default_region:
+        args.default_region = args.default_region.upper()
+        if args.default_region not in phonenumbers.SUPPORTED_REGIONS:
+            parser.error(f'--default-region: unknown region {args.default_region}')
+    if args.store:
+        try:
+            ColumnarStore.check_path(args.store)
+        except ValueError as e:
+            parser.error(f"--store: {e}")
+    if args.report_top < 0:
+        parser.error('--report-top must be 0 or a positive number')
+    if args.report and args.format not in (None, "text", "json"):
+        parser.error('--report supports --format text or json')
+    if args.dedup == "bloom" and (args.dedup_capacity < 1 or not 0 < args.dedup_error_rate < 1):
+        parser.error('--dedup-capacity must be positive and --dedup-error-rate between 0 and 1')
     
-    # Determine which analyses to run
-    web_search = args.web or args.all
-    verbose = args.verbose or args.all
+    # With --store alone, records are only written when asked for explicitly
+    write_records = not args.report and (not args.store or args.format or args.output)
+    checkpoint = None
+    resumed = False
+    if args.resume and not args.checkpoint:
+        parser.error('--resume needs --checkpoint')
+    if args.checkpoint:
+        if not args.input or args.input == '-' or not os.path.isfile(args.input):
+            parser.error('--checkpoint needs a regular --input file')
+        if write_records and args.output in (None, '-'):
+            parser.error('--checkpoint needs --output FILE so a resumed run can cut it back')
+        if args.checkpoint_interval < 0:
+            parser.error('--checkpoint-interval must be 0 or a positive number')
+        checkpoint = Checkpoint(args.checkpoint, checkpoint_signature(args), args.checkpoint_interval)
+        if args.resume:
+            try:
+                resumed = checkpoint.load()
+            except (OSError, ValueError, pickle.UnpicklingError) as e:
+                parser.error(f"--resume: {e}")
+            if resumed and write_records and (not os.path.isfile(args.output)
+                                              or os.path.getsize(args.output) < checkpoint.output_offset):
+                parser.error(f"--resume: {args.output} is shorter than when {args.checkpoint} was saved")
+            if not resumed:
+                print(f"⚠️  No checkpoint at {args.checkpoint}, starting from the beginning", file=sys.stderr)
+        elif os.path.exists(args.checkpoint):
+            print(f"⚠️  Replacing the checkpoint at {args.checkpoint}; pass --resume to continue it instead",
+                  file=sys.stderr)
     
-    tool.run_comprehensive_analysis(args.phone_number, verbose, web_search)
+    if args.enrich_timeout <= 0:
+        parser.error('--enrich-timeout must be a positive number')
+    if args.enrich_retries < 0:
+        parser.error('--enrich-retries must be 0 or a positive number')
+    if args.providers:
+        try:
+            load_providers(args.providers)
+        except (OSError, ValueError) as e:
+            parser.error(f"--providers: {e}")
+    
+    if args.cache_db:
+        if args.cache_ttl <= 0:
+            parser.error('--cache-ttl must be a positive number')
+        if args.cache_max_entries < 1:
+            parser.error('--cache-max-entries must be a positive number')
+    
+    tool = PhoneLookupTool(
+        prefix_cache_size=args.prefix_cache_size,
+        cache_db=args.cache_db,
+        cache_ttl=args.cache_ttl,
+        cache_max_entries=args.cache_max_entries,
+        prefix_index=args.prefix_index,
+        providers_file=args.providers,
+        enrich_timeout=args.enrich_timeout,
+        enrich_retries=args.enrich_retries,
+        profile=args.profile or bool(args.metrics_file),
+        default_region=args.default_region,
+    )
+    ready_at = time.perf_counter()
+    exit_code = 0
+    output = None
+    
+    try:
+        if args.serve:
+            run_server(LookupService(tool, args.max_pending, args.max_batch), args.serve, args.verbose)
+        elif args.input or args.range or args.format or args.store or args.report:
+            # Structured output: batch mode, or a single number rendered as a record
+            if args.input:
+                try:
+                    # Regular files are memory-mapped; stdin and pipes are read as text streams
+                    if args.input != '-' and os.path.isfile(args.input):
+                        source = MappedInput(args.input)
+                    else:
+                        source = open_input(args.input)
+                except OSError as e:
+                    parser.error(f"cannot read {args.input}: {e}")
+            else:
+                source = nullcontext()
+                if args.range:
+                    print(f"🔢 Analyzing {len(block)} numbers from +{block.first} to +{block.last}", file=sys.stderr)
+            try:
+                output = open_output(args.output, checkpoint.output_offset if resumed else None)
+            except OSError as e:
+                parser.error(f"cannot write {args.output}: {e}")
+            try:
+                normalizer = None
+                store = ColumnarStore() if args.store else None
+                report = AggregateReport() if args.report else None
+                if args.dedup:
+                    deduplicator = (BloomDeduplicator(args.dedup_capacity, args.dedup_error_rate)
+                                    if args.dedup == "bloom" else ExactDeduplicator())
+                    normalizer = InputNormalizer(args.default_region, deduplicator, tool.metrics)
+                if resumed:
+                    normalizer, store, report = checkpoint.state
+                    if normalizer is not None:
+                        normalizer.metrics = tool.metrics
+                    print(f"⏯️  Resuming at byte {checkpoint.offset} of {source.size} "
+                          f"after {checkpoint.records} records", file=sys.stderr)
+                if checkpoint is not None:
+                    checkpoint.state = (normalizer, store, report)
+                sinks = [sink for sink in (store, report) if sink is not None]
+                with source:
+                    if isinstance(source, MappedInput):
+                        numbers = source
+                    elif args.range:
+                        numbers = block
+                    else:
+                        numbers = iter_input_numbers(source) if args.input else [args.phone_number]
+                    tool.run_batch(numbers, output if write_records else None, workers, args.chunk_size,
+                                   args.validate_only, args.enrich, args.format or "ndjson", sinks, normalizer,
+                                   checkpoint)
+                if report is not None:
+                    if args.format == "json":
+                        output.write(json.dumps(report.summary(args.report_top), ensure_ascii=False, indent=2) + "\n")
+                    else:
+                        output.write(report.render(args.report_top))
+                if store is not None:
+                    store.save(args.store)
+                    print(f"💾 Stored {len(store)} rows ({store.nbytes() / 1e6:.1f} MB in memory) in {args.store}",
+                          file=sys.stderr)
+                if normalizer is not None:
+                    stats = normalizer.stats()
+                    print(f"🧹 {stats['inputs']} inputs, {stats['unique']} distinct, "
+                          f"{stats['duplicates']} duplicates collapsed, {stats['unparseable']} unparseable",
+                          file=sys.stderr)
+                if args.cache_stats:
+                    print(f"Cache stats: {json.dumps(tool.cache_stats())}", file=sys.stderr)
+                if checkpoint is not None:
+                    output.flush()
+                    checkpoint.remove()
+            except KeyboardInterrupt:
+                print("\n⚠️  Operation cancelled by user", file=sys.stderr)
+                exit_code = 130
+        elif args.validate_only:
+            record = tool.validate_record(args.phone_number)
+            if record["valid"]:
+                print(f"✅ Valid: {record['e164_format']}")
+            else:
+                print(f"❌ Invalid: {args.phone_number}")
+                exit_code = 1
+        else:
+            # Determine which analyses to run
+            web_search = args.web or args.all
+            verbose = args.verbose or args.all
+            
+            tool.run_comprehensive_analysis(args.phone_number, verbose, web_search)
+    finally:
+        if output is not None:
+            output.close()
+        tool.close()
+        if tool.metrics:
+            write_metrics(tool, args.profile, args.metrics_file)
+        if args.startup_time:
+            print_startup_time(ready_at)
+    
+    if exit_code:
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
-    # Check dependencies
+    # Check dependencies; requests is only needed for web lookups and imported there
     try:
         import phonenumbers
-        import requests
-        import bs4
     except ImportError as e:
         print("❌ Missing dependencies. Please install required packages:")
-        print("   pip install phonenumbers requests beautifulsoup4")
+        print("   pip install phonenumbers")
         sys.exit(1)
     
     main()
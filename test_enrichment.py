@@ -0,0 +1,129 @@
+"""Enrichment tests against a local stub HTTP server"""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from phone_lookup import Enricher
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers GET /<digits> as the server's respond(digits, attempt) says"""
+
+    def do_GET(self):
+        server = self.server
+        digits = self.path.strip("/")
+        with server.lock:
+            server.calls.append(digits)
+            attempt = server.calls.count(digits)
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            status, headers, delay = server.respond(digits, attempt)
+            time.sleep(delay)
+            body = json.dumps({"digits": digits, "attempt": attempt}).encode()
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up, e.g. after a timeout
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+class EnricherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.active = 0
+        self.server.peak = 0
+        self.server.respond = lambda digits, attempt: (200, (), 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = requests.Session()
+        self.enricher = None
+
+    def tearDown(self):
+        if self.enricher is not None:
+            self.enricher.close()
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_enricher(self, timeout=5, retries=2, **settings):
+        provider = {"name": "stub", "url": f"http://127.0.0.1:{self.server.server_port}/{{digits}}",
+                    "concurrency": 4, "rate": 1000}
+        provider.update(settings)
+        self.enricher = Enricher([provider], self.session, timeout, retries)
+        return self.enricher
+
+    def test_answers_are_returned_in_input_order(self):
+        answers = self.make_enricher().enrich_batch(["+15550001", "+15550002"])
+        self.assertEqual([answer["stub"] for answer in answers], [
+            {"status": "ok", "data": {"digits": "15550001", "attempt": 1}},
+            {"status": "ok", "data": {"digits": "15550002", "attempt": 1}},
+        ])
+
+    def test_concurrency_is_capped_per_provider(self):
+        self.server.respond = lambda digits, attempt: (200, (), 0.2)
+        numbers = [f"+1555000{index}" for index in range(6)]
+        answers = self.make_enricher(concurrency=2).enrich_batch(numbers)
+        self.assertTrue(all(answer["stub"]["status"] == "ok" for answer in answers))
+        self.assertEqual(self.server.peak, 2)
+
+    def test_503_is_retried_after_retry_after(self):
+        self.server.respond = lambda digits, attempt: (503, [("Retry-After", "1")], 0) if attempt == 1 else (200, (), 0)
+        started = time.monotonic()
+        answer = self.make_enricher().enrich_batch(["+15550001"])[0]["stub"]
+        self.assertEqual(answer, {"status": "ok", "data": {"digits": "15550001", "attempt": 2}})
+        self.assertGreaterEqual(time.monotonic() - started, 1)
+
+    def test_429_is_retried_until_retries_run_out(self):
+        self.server.respond = lambda digits, attempt: (429, (), 0)
+        enricher = self.make_enricher(retries=1)
+        answer = enricher.enrich_batch(["+15550001"])[0]["stub"]
+        self.assertEqual(answer, {"status": "error", "error": "HTTP 429"})
+        self.assertEqual(self.server.calls, ["15550001", "15550001"])
+        self.assertEqual(enricher.http_calls, 2)
+
+    def test_negative_retries_still_make_one_attempt(self):
+        self.server.respond = lambda digits, attempt: (429, (), 0)
+        answer = self.make_enricher(retries=-1).enrich_batch(["+15550001"])[0]["stub"]
+        self.assertEqual(answer, {"status": "error", "error": "HTTP 429"})
+        self.assertEqual(len(self.server.calls), 1)
+
+    def test_in_flight_duplicates_share_one_request(self):
+        self.server.respond = lambda digits, attempt: (200, (), 0.1)
+        answers = self.make_enricher().enrich_batch(["+15550001"] * 5 + ["+15550002"])
+        self.assertEqual(sorted(self.server.calls), ["15550001", "15550002"])
+        self.assertEqual(len({json.dumps(answer) for answer in answers[:5]}), 1)
+
+    def test_timeout_is_reported_as_an_error(self):
+        self.server.respond = lambda digits, attempt: (200, (), 1)
+        answer = self.make_enricher(timeout=0.2, retries=0).enrich_batch(["+15550001"])[0]["stub"]
+        self.assertEqual(answer["status"], "error")
+        self.assertIn("Timeout", answer["error"])
+
+    def test_rate_limit_holds_across_batches(self):
+        enricher = self.make_enricher(rate=2, burst=1)
+        enricher.enrich_batch(["+15550001"])
+        started = time.monotonic()
+        enricher.enrich_batch(["+15550002"])
+        # A fresh bucket per batch would start with a full burst and not wait
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+
+if __name__ == "__main__":
+    unittest.main()